@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+#
+# compares per-pixel (XGetPixel) and bulk conversion paths of the screenshot
+# library, plus turning a grab into a pygame surface.
+#
+# needs an X server at least as large as the biggest benchmarked resolution, eg:
+#   xvfb-run -s '-screen 0 3840x2160x24' python3 benchmarks/bench_grab.py ./prtscn.so
+
+import os
+import sys
+import time
+import ctypes
+import statistics
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+import pygame
+
+RESOLUTIONS = [(1920, 1080), (3840, 2160)]
+ROUNDS = 20
+
+
+def bench(f, rounds=ROUNDS):
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        f()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    lib_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+            os.path.dirname(os.path.realpath(__file__)), '..', 'i3expo', 'prtscn.so')
+    grab = ctypes.CDLL(lib_path)
+    generic = ctypes.c_int.in_dll(grab, 'prtscn_generic_conversion')
+
+    print('{:>10} {:>14} {:>14} {:>14}'.format('res', 'per-pixel ms', 'bulk ms', 'surface ms'))
+    for w, h in RESOLUTIONS:
+        buf = (ctypes.c_ubyte * (w * h * 4))()
+        assert grab.getScreen(0, 0, w, h, buf) == 0, 'grab failed; is the X screen large enough?'
+
+        generic.value = 1
+        per_pixel = bench(lambda: grab.getScreen(0, 0, w, h, buf))
+        generic.value = 0
+        bulk = bench(lambda: grab.getScreen(0, 0, w, h, buf))
+        surface = bench(lambda: pygame.image.frombuffer(buf, (w, h), 'BGRA'))
+
+        print('{:>10} {:>14.2f} {:>14.2f} {:>14.3f}'.format('{}x{}'.format(w, h), per_pixel, bulk, surface))
+
+    grab.closeDisplay()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+#
+# benchmarks the whole pipeline against a fake i3 (see fake_i3.py) & X server,
+# and writes results as json, for comparing runs across releases (see
+# compare.py):
+#
+#   grab      - screenshot latency per resolution, full size & thumbnail
+#   render    - process_img(), tile layout & expo frame composition costs
+#   daemon    - time to first capture, SIGUSR1 to first UI frame, and
+#               steady-state cpu & RSS of a daemon fed a scripted event stream
+#
+# needs Xvfb (started automatically, sized to fit the layout, if DISPLAY isn't
+# set) and a compiled screenshot library, eg:
+#   python3 benchmarks/bench_pipeline.py i3expo/prtscn.so --out results.json
+#
+# note the daemon part runs a real i3expo instance, ie. stop yours first.
+
+import os
+import sys
+import json
+import time
+import queue
+import ctypes
+import shutil
+import signal
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fake_i3 import FakeI3, parse_layout
+
+RESOLUTIONS = [(1920, 1080), (2560, 1440), (3840, 2160)]
+ROUNDS = 20
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def timed(f, rounds=ROUNDS):
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        f()
+        samples.append(time.perf_counter() - t0)
+    return summary(samples)
+
+
+# ms stats of given samples (in seconds)
+def summary(samples):
+    samples = sorted(samples)
+    return {
+        'median_ms' : statistics.median(samples) * 1000,
+        'p90_ms'    : samples[int(len(samples) * 0.9)] * 1000 if len(samples) > 1 else samples[0] * 1000,
+        'samples'   : len(samples)
+    }
+
+
+def start_xvfb(w, h):
+    if not shutil.which('Xvfb'):
+        sys.exit('DISPLAY not set & no Xvfb found')
+    display = ':{}'.format(90 + os.getpid() % 100)
+    p = subprocess.Popen(['Xvfb', display, '-screen', '0', '{}x{}x24'.format(w, h), '-nolisten', 'tcp'],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ['DISPLAY'] = display
+    time.sleep(1)
+    return p
+
+
+def bench_grab(lib_path, max_w, max_h):
+    lib = ctypes.CDLL(lib_path)
+    results = {}
+    for w, h in RESOLUTIONS:
+        if w > max_w or h > max_h:
+            continue
+        tw, th = w // 4, h // 4
+        full = (ctypes.c_ubyte * (w * h * 4))()
+        thumb = (ctypes.c_ubyte * (tw * th * 4))()
+        if lib.getScreen(0, 0, w, h, full) != 0:
+            sys.exit('grabbing screen failed')
+        results['{}x{}'.format(w, h)] = {
+            'full'  : timed(lambda: lib.getScreen(0, 0, w, h, full)),
+            'thumb' : timed(lambda: lib.getScreenScaled(0, 0, w, h, tw, th, thumb))
+        }
+    lib.closeDisplay()
+    return results
+
+
+# drives i3expo.main's rendering in-process, w/ made up workspaces & thumbnails
+def bench_render(w, h, workspaces):
+    import configparser
+    import logging
+    import i3expo.main as m
+
+    m.logger = logging.getLogger('bench')
+    m.config = configparser.ConfigParser(converters={'color': m.get_color})
+    m.config_file = os.devnull
+    m.read_config()
+    m.thumbnail_size = 'auto'
+    m.output_blacklist = []
+    m.names_style = (m.config.get('CONF', 'names_font'), m.config.getint('CONF', 'names_fontsize'),
+                     m.config.get('CONF', 'names_color'))
+    workers = min(4, os.cpu_count() or 1)  # as per tile_workers default
+    m.tile_pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    pygame = m.import_ui()
+
+    m.global_knowledge = {'active': 1, 'prev_f_w': None, 'wss': {}}
+    for n in range(1, workspaces + 1):
+        m.global_knowledge['wss'][n] = {'op': 'FAKE-0', 'name': str(n), 'id': n, 'last-update': 0, 'state': 0,
+                                        'x': 0, 'y': 0, 'w': w, 'h': h, 'ratio': w / h, 'windows': {},
+                                        'ff': None, 'fp': None}
+    tw, th = m.get_thumbnail_size(w, h, 'FAKE-0')
+    shot = [tw, th, bytearray(os.urandom(tw * th * 4))]
+    for n in m.global_knowledge['wss']:
+        m.thumbs.put(n, list(shot))
+    wss = list(m.global_knowledge['wss'])
+    grid = m.resolve_grid_layout(w, h, wss)
+
+    def layout():
+        m.get_max_tile_dimensions.cache_clear()
+        m.layout_tiles(w, h, grid, wss)
+
+    def render_cold():
+        m.frame_cache['geometry'] = None
+        m.frame_cache['rendered'].clear()
+        m.render_frame(wss)
+
+    def render_one_changed():
+        m.thumbs.put(1, list(shot))
+        m.render_frame(wss)
+
+    return {
+        'resolution'         : '{}x{}'.format(w, h),
+        'workspaces'         : workspaces,
+        'thumbnail'          : '{}x{}'.format(tw, th),
+        'process_img'        : timed(lambda: m.process_img(shot), rounds=100),
+        'layout'             : timed(layout, rounds=100),
+        'render_cold'        : timed(render_cold),
+        'render_one_changed' : timed(render_one_changed),
+        'render_unchanged'   : timed(lambda: m.render_frame(wss), rounds=100),
+        'pygame'             : pygame.version.ver
+    }
+
+
+# (cpu seconds consumed so far, rss in bytes) of given process
+def proc_sample(pid):
+    with open('/proc/{}/stat'.format(pid)) as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK, int(fields[21]) * PAGE_SIZE
+
+
+def bench_daemon(lib_path, layout, toggles, cpu_window, event_interval):
+    tmp = tempfile.mkdtemp(prefix='i3expo-bench-')
+    sock = os.path.join(tmp, 'i3.sock')
+    FakeI3(sock, layout).start(event_interval)
+
+    os.makedirs(os.path.join(tmp, 'i3expo'))
+    with open(os.path.join(tmp, 'i3expo', 'config'), 'w') as f:
+        f.write('[CONF]\n'
+                'screenshot_lib_path = {}\n'
+                'state_f = {}\n'
+                'ctl_socket = {}\n'  # not to take over the socket of a daemon already running
+                'log_lvl = DEBUG\n'
+                'pause_when_idle_sec = 0\n'.format(os.path.abspath(lib_path), os.path.join(tmp, 'state'),
+                                                   os.path.join(tmp, 'ctl.sock')))
+
+    env = dict(os.environ, I3SOCK=sock, XDG_CONFIG_HOME=tmp, PYTHONUNBUFFERED='1')
+    t0 = time.perf_counter()
+    # started as the console script does
+    p = subprocess.Popen([sys.executable, '-c', 'from i3expo import run; run()'], env=env, text=True,
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    lines = queue.Queue()
+    reader = Thread(target=lambda: [lines.put(l) for l in p.stdout])
+    reader.daemon = True
+    reader.start()
+
+    def wait_for(text, timeout=30):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            try:
+                line = lines.get(timeout=deadline - time.perf_counter())
+            except queue.Empty:
+                break
+            if text in line:
+                return time.perf_counter()
+        raise RuntimeError('daemon never logged [{}]'.format(text))
+
+    try:
+        first_capture = wait_for('first capture done') - t0
+        time.sleep(2)  # let UI warm up in the background
+
+        to_frame = []
+        for _ in range(toggles):
+            t1 = time.perf_counter()
+            p.send_signal(signal.SIGUSR1)
+            to_frame.append(wait_for('UI shown in') - t1)
+            time.sleep(0.2)
+            p.send_signal(signal.SIGUSR1)  # close it again
+            time.sleep(0.5)
+
+        cpu0, _ = proc_sample(p.pid)
+        time.sleep(cpu_window)
+        cpu1, rss = proc_sample(p.pid)
+    finally:
+        p.terminate()
+        p.wait(10)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        'layout'               : ','.join('{}x{}'.format(*o) for o in layout),
+        'first_capture_s'      : first_capture,
+        'sigusr1_to_frame'     : summary(to_frame),
+        'cpu_s_per_min'        : (cpu1 - cpu0) / cpu_window * 60,
+        'cpu_window_s'         : cpu_window,
+        'event_interval_s'     : event_interval,
+        'rss_mb'               : rss / 2**20
+    }
+
+
+def git_rev():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='i3expo pipeline benchmarks')
+    parser.add_argument('lib', help='path to compiled prtscn.so')
+    parser.add_argument('--layout', default='1920x1080,2560x1440', help='comma-separated output resolutions for the fake i3')
+    parser.add_argument('--workspaces', type=int, default=9, help='workspaces rendered in the render benchmark')
+    parser.add_argument('--toggles', type=int, default=10)
+    parser.add_argument('--cpu-window', type=float, default=60.0, help='seconds steady-state cpu is sampled for')
+    parser.add_argument('--event-interval', type=float, default=1.0, help='seconds between scripted i3 events')
+    parser.add_argument('--only', choices=['grab', 'render', 'daemon'], action='append', help='run only given parts')
+    parser.add_argument('--out', help='write results here instead of stdout')
+    args = parser.parse_args()
+
+    layout = parse_layout(args.layout)
+    screen_w = max(sum(w for w, _ in layout), max(w for w, _ in RESOLUTIONS))
+    screen_h = max(max(h for _, h in layout), max(h for _, h in RESOLUTIONS))
+    xvfb = start_xvfb(screen_w, screen_h) if not os.environ.get('DISPLAY') else None
+    parts = args.only or ['grab', 'render', 'daemon']
+
+    results = {
+        'meta': {
+            'timestamp' : int(time.time()),
+            'git'       : git_rev(),
+            'python'    : platform.python_version(),
+            'machine'   : platform.machine(),
+            'cpus'      : os.cpu_count(),
+            'display'   : os.environ['DISPLAY']
+        }
+    }
+    try:
+        if 'grab' in parts:
+            results['grab'] = bench_grab(args.lib, screen_w, screen_h)
+        if 'render' in parts:
+            results['render'] = bench_render(layout[0][0], layout[0][1], args.workspaces)
+        if 'daemon' in parts:
+            results['daemon'] = bench_daemon(args.lib, layout, args.toggles, args.cpu_window, args.event_interval)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    out = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out + '\n')
+    else:
+        print(out)
+
+
+if __name__ == '__main__':
+    main()
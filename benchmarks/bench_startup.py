@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+#
+# measures what importing the daemon costs, ie. what every i3 reload pays
+# before the first screenshot can be taken; heaviest imports are listed, and
+# UI-only modules (which are to be imported lazily) are flagged if present.
+#
+# time to first capture is logged by the daemon itself on startup:
+#   INFO:i3expo.main:first capture done 0.231s after import
+
+import re
+import sys
+import subprocess
+
+UI_MODULES = ('pygame', 'PIL', 'pulp')
+TOP = 10
+
+
+def main():
+    p = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import i3expo.main'],
+                       capture_output=True, text=True, check=True)
+
+    # lines are: "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in p.stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if m:
+            imports.append((int(m.group(2)), len(m.group(3)), m.group(4)))
+
+    # children are listed right before their parent, indented one level (2 spaces) deeper:
+    idx = next(i for i, (_, _, name) in enumerate(imports) if name == 'i3expo.main')
+    total, depth, _ = imports[idx]
+    children = []
+    for cumulative, d, name in reversed(imports[:idx]):
+        if d <= depth:
+            break
+        elif d == depth + 2:
+            children.append((cumulative, name))
+
+    print('importing i3expo.main: {:.1f} ms'.format(total / 1000))
+    print('heaviest imports of i3expo.main:')
+    for cumulative, name in sorted(children, reverse=True)[:TOP]:
+        print('  {:>8.1f} ms  {}'.format(cumulative / 1000, name))
+
+    eager_ui = sorted({name.split('.')[0] for _, _, name in imports} & set(UI_MODULES))
+    if eager_ui:
+        print('UI modules imported eagerly: {}'.format(', '.join(eager_ui)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+#
+# compares two bench_pipeline.py result files, eg. of different releases:
+#   python3 benchmarks/compare.py old.json new.json
+
+import sys
+import json
+
+
+# nested dicts -> {'a.b.c': number}
+def flatten(d, prefix=''):
+    out = {}
+    for k, v in d.items():
+        if isinstance(v, dict):
+            out.update(flatten(v, prefix + k + '.'))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[prefix + k] = v
+    return out
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit('usage: {} <old.json> <new.json>'.format(sys.argv[0]))
+    with open(sys.argv[1]) as f:
+        old = json.load(f)
+    with open(sys.argv[2]) as f:
+        new = json.load(f)
+    print('old: {}  new: {}'.format(old['meta'].get('git'), new['meta'].get('git')))
+
+    old = flatten({k: v for k, v in old.items() if k != 'meta'})
+    new = flatten({k: v for k, v in new.items() if k != 'meta'})
+    for key in sorted(old.keys() & new.keys()):
+        if key.endswith('.samples'):
+            continue
+        change = '{:+.1f}%'.format((new[key] - old[key]) / old[key] * 100) if old[key] else 'n/a'
+        print('{:<45} {:>12.3f} {:>12.3f} {:>9}'.format(key, old[key], new[key], change))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+#
+# stand-in for i3's IPC socket, for benchmarking without a running i3: serves a
+# scripted layout (outputs side by side, each with given no of workspaces &
+# windows) and plays a scripted event stream to subscribers.
+#
+# point i3ipc at it via I3SOCK, eg:
+#   python3 benchmarks/fake_i3.py /tmp/fake-i3.sock --layout 1920x1080,2560x1440 &
+#   I3SOCK=/tmp/fake-i3.sock i3expo
+
+import os
+import sys
+import json
+import time
+import struct
+import socket
+import argparse
+import itertools
+from threading import Thread, Lock
+
+MAGIC = b'i3-ipc'
+HEADER = struct.Struct('=6sII')
+
+# message types
+COMMAND, GET_WORKSPACES, SUBSCRIBE, GET_OUTPUTS, GET_TREE, GET_MARKS, GET_BAR_CONFIG, GET_VERSION = range(8)
+# event types; sent w/ the highest bit set
+EVENTS = {'workspace': 0, 'output': 1, 'mode': 2, 'window': 3, 'barconfig_update': 4,
+          'binding': 5, 'shutdown': 6, 'tick': 7}
+
+
+def parse_layout(raw):
+    return [tuple(int(i) for i in o.split('x')) for o in raw.split(',')]
+
+
+class FakeI3(object):
+
+    def __init__(self, path, layout, workspaces=2, windows=3):
+        self.path = path
+        self.lock = Lock()
+        self.subscribers = []  # [(socket, set of event names)]
+        self.ids = itertools.count(1)
+        self.outputs = []
+        self.workspaces = []  # [(output, ws con)]
+        x = 0
+        num = itertools.count(1)
+        for idx, (w, h) in enumerate(layout):
+            name = 'FAKE-{}'.format(idx)
+            rect = {'x': x, 'y': 0, 'width': w, 'height': h}
+            wss = []
+            for _ in range(workspaces):
+                n = next(num)
+                wins = [self._con('con', 'window {}'.format(i), rect, window=next(self.ids),
+                                  window_properties={'class': 'Fake', 'instance': 'fake', 'title': 'window {}'.format(i)})
+                        for i in range(windows)]
+                ws = self._con('workspace', str(n), rect, nodes=wins, num=n, output=name)
+                wss.append(ws)
+                self.workspaces.append((name, ws))
+            self.outputs.append({'name': name, 'active': True, 'primary': idx == 0, 'rect': rect,
+                                 'current_workspace': wss[0]['name'], 'nodes': wss})
+            x += w
+
+        self.focused = self.workspaces[0][1]['nodes'][0] if windows else self.workspaces[0][1]
+        self.focused['focused'] = True
+
+    def _con(self, type, name, rect, nodes=(), **kw):
+        c = {'id': next(self.ids), 'type': type, 'name': name, 'rect': dict(rect), 'focused': False,
+             'nodes': list(nodes), 'floating_nodes': [], 'focus': [n['id'] for n in nodes],
+             'layout': 'splith', 'border': 'normal', 'percent': None, 'urgent': False}
+        c.update(kw)
+        return c
+
+    def tree(self):
+        outputs = [self._con('output', o['name'], o['rect'],
+                             nodes=[self._con('con', 'content', o['rect'], nodes=o['nodes'])])
+                   for o in self.outputs]
+        return self._con('root', 'root', {'x': 0, 'y': 0, 'width': 0, 'height': 0}, nodes=outputs)
+
+    def reply(self, msg_type, payload):
+        if msg_type == COMMAND:
+            return [{'success': True} for _ in payload.split(';')]
+        elif msg_type == GET_WORKSPACES:
+            current = {o['current_workspace'] for o in self.outputs}
+            return [{'id': ws['id'], 'num': ws['num'], 'name': ws['name'], 'visible': ws['name'] in current,
+                     'focused': ws is self.focused_ws(), 'urgent': False, 'rect': ws['rect'], 'output': op}
+                    for op, ws in self.workspaces]
+        elif msg_type == GET_OUTPUTS:
+            return [{k: v for k, v in o.items() if k != 'nodes'} for o in self.outputs]
+        elif msg_type == GET_TREE:
+            return self.tree()
+        elif msg_type == GET_VERSION:
+            return {'major': 4, 'minor': 23, 'patch': 0, 'human_readable': '4.23 (fake)',
+                    'loaded_config_file_name': ''}
+        elif msg_type in (GET_MARKS, GET_BAR_CONFIG):
+            return []
+        return {'success': False, 'error': 'unsupported message type {}'.format(msg_type)}
+
+    def focused_ws(self):
+        for _, ws in self.workspaces:
+            if self.focused is ws or self.focused in ws['nodes']:
+                return ws
+
+    def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        srv.bind(self.path)
+        srv.listen(8)
+        while True:
+            conn, _ = srv.accept()
+            t = Thread(target=self._handle, args=(conn,))
+            t.daemon = True
+            t.start()
+
+    def _handle(self, conn):
+        try:
+            while True:
+                header = self._recv(conn, HEADER.size)
+                magic, length, msg_type = HEADER.unpack(header)
+                if magic != MAGIC:
+                    break
+                payload = self._recv(conn, length).decode('utf-8')
+                if msg_type == SUBSCRIBE:
+                    with self.lock:
+                        self.subscribers.append((conn, set(json.loads(payload))))
+                    self._send(conn, msg_type, {'success': True})
+                else:
+                    with self.lock:
+                        self._send(conn, msg_type, self.reply(msg_type, payload))
+        except (OSError, EOFError):
+            pass
+        finally:
+            with self.lock:
+                self.subscribers = [s for s in self.subscribers if s[0] is not conn]
+            conn.close()
+
+    @staticmethod
+    def _recv(conn, n):
+        data = b''
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise EOFError()
+            data += chunk
+        return data
+
+    @staticmethod
+    def _send(conn, msg_type, obj):
+        payload = json.dumps(obj).encode('utf-8')
+        conn.sendall(HEADER.pack(MAGIC, len(payload), msg_type) + payload)
+
+    def emit(self, event, obj):
+        with self.lock:
+            for conn, events in self.subscribers:
+                if event in events:
+                    try:
+                        self._send(conn, EVENTS[event] | 1 << 31, obj)
+                    except OSError:
+                        pass
+
+    # scripted event stream: focused window's title changes every interval
+    # seconds, eg. a terminal w/ output scrolling by; every 5th time focus
+    # moves on to the next window instead.
+    def play(self, interval):
+        for i in itertools.count():
+            time.sleep(interval)
+            with self.lock:
+                ws = self.focused_ws()
+                if i % 5 == 4 and len(ws['nodes']) > 1:
+                    self.focused['focused'] = False
+                    idx = ws['nodes'].index(self.focused)
+                    self.focused = ws['nodes'][(idx + 1) % len(ws['nodes'])]
+                    self.focused['focused'] = True
+                    change = 'focus'
+                else:
+                    self.focused['name'] = self.focused['window_properties']['title'] = 'tick {}'.format(i)
+                    change = 'title'
+                container = dict(self.focused)
+            self.emit('window', {'change': change, 'container': container})
+
+    def start(self, event_interval=None):
+        for target, args in ((self.serve, ()), (self.play, (event_interval,))):
+            if target == self.play and not event_interval:
+                continue
+            t = Thread(target=target, args=args)
+            t.daemon = True
+            t.start()
+        while not os.path.exists(self.path):
+            time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='fake i3 IPC server')
+    parser.add_argument('socket')
+    parser.add_argument('--layout', default='1920x1080', help='comma-separated output resolutions, placed side by side')
+    parser.add_argument('--workspaces', type=int, default=2, help='workspaces per output')
+    parser.add_argument('--windows', type=int, default=3, help='windows per workspace')
+    parser.add_argument('--event-interval', type=float, default=1.0, help='seconds between scripted events; 0 for none')
+    args = parser.parse_args()
+
+    FakeI3(args.socket, parse_layout(args.layout), args.workspaces, args.windows).start(args.event_interval)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+#
+# soak test for UI toggling: toggles the UI of a running daemon open & closed
+# (via SIGUSR1) many times over, and compares daemon's idle cpu usage & RSS
+# before and after. Idle cpu should not rise, and RSS should level off.
+#
+# needs a running i3 session with at least 2 workspaces, eg:
+#   python3 benchmarks/soak_toggle.py $(pgrep -f i3expo) 200
+
+import os
+import sys
+import time
+import signal
+
+IDLE_SAMPLE_SEC = 10
+TOGGLE_INTERVAL_SEC = 0.3
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+# returns (cpu seconds consumed so far, rss in bytes)
+def sample(pid):
+    with open('/proc/{}/stat'.format(pid)) as f:
+        fields = f.read().rsplit(')', 1)[1].split()  # comm may contain spaces
+    # utime & stime are fields 14 & 15, rss 24; we've dropped the first 2 above:
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK, int(fields[21]) * PAGE_SIZE
+
+
+def idle_cpu(pid):
+    cpu0, _ = sample(pid)
+    time.sleep(IDLE_SAMPLE_SEC)
+    cpu1, rss = sample(pid)
+    return (cpu1 - cpu0) / IDLE_SAMPLE_SEC * 100, rss
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit('usage: {} <i3expo pid> [toggles]'.format(sys.argv[0]))
+    pid = int(sys.argv[1])
+    toggles = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    cpu_before, rss_before = idle_cpu(pid)
+    print('idle before: {:.2f}% cpu, {:.1f} MB rss'.format(cpu_before, rss_before / 2**20))
+
+    t0 = time.perf_counter()
+    for i in range(toggles):
+        os.kill(pid, signal.SIGUSR1)  # open...
+        time.sleep(TOGGLE_INTERVAL_SEC)
+        os.kill(pid, signal.SIGUSR1)  # ...and close
+        time.sleep(TOGGLE_INTERVAL_SEC)
+        if (i+1) % 50 == 0:
+            _, rss = sample(pid)
+            print('  {} toggles, {:.1f} MB rss'.format(i+1, rss / 2**20))
+    print('{} toggles took {:.1f}s'.format(toggles, time.perf_counter()-t0))
+
+    cpu_after, rss_after = idle_cpu(pid)
+    print('idle after:  {:.2f}% cpu, {:.1f} MB rss'.format(cpu_after, rss_after / 2**20))
+    print('idle cpu delta: {:+.2f}%, rss delta: {:+.1f} MB'.format(
+        cpu_after - cpu_before, (rss_after - rss_before) / 2**20))
+
+
+if __name__ == '__main__':
+    main()
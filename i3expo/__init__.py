@@ -1 +1,5 @@
-from .main import run
+# note i3expo.main is imported only once run, so the i3expo-ctl client
+# doesn't pull in the whole daemon
+def run():
+    from .main import run
+    run()
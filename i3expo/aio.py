@@ -0,0 +1,105 @@
+# asyncio event core, used with event_core = asyncio:
+#
+# i3 events are read by an i3ipc.aio connection on an event loop running in its
+# own thread; debouncing, update delays and periodic refreshes are all timers on
+# that same loop. Actual handlers - which query i3 via the regular (blocking)
+# connection & grab screenshots - are run one at a time on a single worker
+# thread, so nothing ever blocks reading events, and handlers never race each
+# other over global_knowledge.
+#
+# main thread is left free for signal handling & the UI.
+
+import asyncio
+import logging
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+import i3ipc.aio
+
+logger = logging.getLogger(__name__)
+
+
+# drop-in for debounce.Scheduler that runs callbacks on an asyncio loop; note
+# default loop clock is time.monotonic(), ie. the one debounce.py uses.
+class AioScheduler(object):
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    def call_at(self, when, f):
+        self.loop.call_soon_threadsafe(self.loop.call_at, when, f)
+
+
+class EventCore(object):
+
+    def __init__(self, i3):
+        self.i3 = i3  # blocking connection handlers are passed, as before
+        self.loop = asyncio.new_event_loop()
+        self.scheduler = AioScheduler(self.loop)
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='i3expo-worker')
+        self.subscriptions = []
+        self.conn = None
+
+    # returns function that runs f(*args, **kwargs) on the worker after
+    # get_delay() seconds; safe to call from any thread.
+    def deferred(self, f, get_delay=lambda: 0):
+        def submit(*args, **kwargs):
+            self.loop.call_soon_threadsafe(self.loop.call_later, get_delay(), self._submit, f, args, kwargs)
+        return submit
+
+    def _submit(self, f, args, kwargs):
+        try:
+            self.worker.submit(self._call, f, args, kwargs)
+        except RuntimeError:  # worker shut down by stop(); loop is about to follow
+            pass
+
+    @staticmethod
+    def _call(f, args, kwargs):
+        try:
+            f(*args, **kwargs)
+        except Exception:
+            logger.exception('handler [{}] failed'.format(getattr(f, '__name__', f)))
+
+    # handler is called w/ (i3, event) on the loop if it's cheap & non-blocking
+    # (eg. a Debounce on our scheduler), otherwise on the worker.
+    def on(self, event, handler, on_loop=False):
+        def dispatch(conn, e):
+            if on_loop:
+                handler(self.i3, e)
+            else:
+                self._submit(handler, (self.i3, e), {})
+        self.subscriptions.append((event, dispatch))
+
+    # run f on the worker every get_interval() seconds; interval is re-read
+    # each time, so it follows config reloads.
+    def call_every(self, get_interval, f):
+        def tick():
+            self._submit(f, (), {})
+            self.loop.call_later(get_interval(), tick)
+        self.loop.call_soon_threadsafe(self.loop.call_later, get_interval(), tick)
+
+    def start(self):
+        t = Thread(target=self._run, name='i3expo-aio')
+        t.daemon = True
+        t.start()
+
+    # stops reading events & the loop along w/ it, and the worker; a handler
+    # already running is left to finish, queued ones are dropped.
+    def stop(self):
+        if self.conn is not None:
+            self.loop.call_soon_threadsafe(self.conn.main_quit)
+        else:  # still connecting
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.worker.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        except Exception:
+            logger.exception('asyncio event core died')
+
+    async def _main(self):
+        self.conn = await i3ipc.aio.Connection().connect()
+        for event, dispatch in self.subscriptions:
+            self.conn.on(event, dispatch)
+        await self.conn.main()
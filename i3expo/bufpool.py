@@ -0,0 +1,39 @@
+import ctypes
+from collections import deque
+from threading import Lock
+
+
+# recycles ctypes capture buffers, so steady-state grabbing allocates (and
+# zero-fills) nothing. Buffers are keyed by their dimensions, and handed out
+# oldest-released first, ie. a buffer that's just been dropped by a reader
+# (eg. replaced in the thumbnail store) is the last one to be written over.
+class BufferPool(object):
+
+    def __init__(self, max_free=2):
+        self.max_free = max_free  # max no of free buffers kept per dimensions
+        self.free = {}  # (w, h) -> deque of free buffers
+        self.lock = Lock()
+        self.stats = {
+            'allocs' : 0,
+            'reuses' : 0
+        }
+
+    # returns w x h BGRA buffer; note its contents are undefined
+    def acquire(self, w, h):
+        with self.lock:
+            free = self.free.get((w, h))
+            if free:
+                self.stats['reuses'] += 1
+                return free.popleft()
+            self.stats['allocs'] += 1
+        return (ctypes.c_ubyte * (w * h * 4))()  # *4 for B,G,R,A
+
+    # hand buffer back once nothing reads it anymore; anything that's not one
+    # of ours (eg. decompressed or mmapped data) is ignored
+    def release(self, w, h, buf):
+        if not isinstance(buf, ctypes.Array) or len(buf) != w * h * 4:
+            return
+        with self.lock:
+            free = self.free.setdefault((w, h), deque())
+            if len(free) < self.max_free:
+                free.append(buf)
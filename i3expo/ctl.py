@@ -0,0 +1,135 @@
+# unix socket control channel: the daemon serves one command per connection,
+# and the i3expo-ctl client sends one, eg. for i3 config:
+#   bindsym $mod1+e exec --no-startup-id i3expo-ctl toggle
+#
+# protocol is a single line each way: request is the command & its args separated
+# by spaces, reply is its output; failed ones are prefixed w/ 'error: '.
+#
+# note this module is imported by the client, so it must stay free of anything
+# heavy - ie. no imports from the rest of i3expo.
+
+import os
+import sys
+import socket
+import inspect
+import logging
+import argparse
+from threading import Thread
+
+COMMANDS = ('toggle', 'show', 'hide', 'refresh', 'stats')
+MAX_REQUEST = 4096
+TIMEOUT_SEC = 5
+
+logger = logging.getLogger(__name__)
+
+
+def default_socket_path():
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or '/tmp', 'i3expo-{}.sock'.format(os.getuid()))
+
+
+# commands is a dict of command name -> f(*args) returning its reply, if any;
+# these are called from the server's thread.
+class ControlServer(object):
+
+    def __init__(self, path, commands):
+        self.path = path
+        self.commands = commands
+        self.sock = None
+
+    def start(self):
+        if os.path.exists(self.path):  # stale one left behind; we're single instance anyway
+            os.unlink(self.path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self.sock.listen(8)
+
+        t = Thread(target=self._serve, name='i3expo-ctl')
+        t.daemon = True
+        t.start()
+
+    def stop(self):
+        if self.sock is not None:
+            self.sock.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:  # closed by stop()
+                return
+            with conn:
+                try:
+                    conn.settimeout(TIMEOUT_SEC)
+                    conn.sendall((self.dispatch(self._read_line(conn)) + '\n').encode('utf-8'))
+                except OSError as e:
+                    logger.debug('control connection failed: {}'.format(e))
+
+    @staticmethod
+    def _read_line(conn):
+        data = b''
+        while b'\n' not in data and len(data) < MAX_REQUEST:
+            chunk = conn.recv(MAX_REQUEST)
+            if not chunk:
+                break
+            data += chunk
+        return data.split(b'\n', 1)[0].decode('utf-8', 'replace')
+
+    def dispatch(self, line):
+        args = line.split()
+        if not args:
+            return 'error: no command given'
+        f = self.commands.get(args[0])
+        if f is None:
+            return 'error: unknown command [{}]'.format(args[0])
+        try:
+            inspect.signature(f).bind(*args[1:])
+        except TypeError:
+            return 'error: wrong no of arguments for [{}]'.format(args[0])
+        try:
+            reply = f(*args[1:])
+        except ValueError as e:  # bad args
+            return 'error: {}'.format(e)
+        except Exception as e:
+            logger.exception('control command [{}] failed'.format(line))
+            return 'error: {}'.format(e)
+        return 'ok' if reply is None else str(reply)
+
+
+# sends given command & returns (reply, ok)
+def send(path, args):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(TIMEOUT_SEC)
+        s.connect(path)
+        s.sendall((' '.join(args) + '\n').encode('utf-8'))
+        data = b''
+        while True:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    reply = data.decode('utf-8').rstrip('\n')
+    return reply, not reply.startswith('error: ')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='control a running i3expo')
+    parser.add_argument('command', choices=COMMANDS)
+    parser.add_argument('args', nargs='*', help='eg. ws num for refresh')
+    parser.add_argument('--socket', default=default_socket_path(), help='as per ctl_socket config item')
+    args = parser.parse_args()
+
+    try:
+        reply, ok = send(args.socket, [args.command] + args.args)
+    except OSError as e:
+        sys.exit('connecting to i3expo at [{}] failed: {}'.format(args.socket, e))
+    print(reply)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
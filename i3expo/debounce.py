@@ -1,26 +1,125 @@
-from threading import Timer
+import heapq
+import logging
+import itertools
+from time import monotonic
+from functools import partial
+from threading import Thread, Lock, Condition
 
+logger = logging.getLogger(__name__)
 
+
+# runs callbacks at given (monotonic) times from a single thread, so debouncing
+# doesn't cost a thread per burst. Note callbacks are run one after another,
+# ie. they shouldn't block for long.
+class Scheduler(object):
+
+    def __init__(self):
+        self.heap = []  # [(when, seq, f)]; seq keeps entries w/ the same time ordered & comparable
+        self.seq = itertools.count()
+        self.cond = Condition()
+        self.thread = None
+
+    def call_at(self, when, f):
+        with self.cond:
+            heapq.heappush(self.heap, (when, next(self.seq), f))
+            if self.thread is None:  # started lazily, so merely importing us spawns nothing
+                self.thread = Thread(target=self._run, name='scheduler')
+                self.thread.daemon = True
+                self.thread.start()
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.heap or self.heap[0][0] > monotonic():
+                    self.cond.wait(self.heap[0][0] - monotonic() if self.heap else None)
+                f = heapq.heappop(self.heap)[2]
+            try:
+                f()
+            except Exception:
+                logger.exception('scheduled call failed')
+
+
+scheduler = Scheduler()  # shared by all debouncers by default
+
+
+# trailing-edge debouncer: wrapped function is called once calls have stopped
+# coming in for period seconds, with the arguments of the last call.
 class Debounce(object):
 
-    def __init__(self, period, f):
-        self.period = period  # never call the wrapped function more often than this (in seconds)
+    def __init__(self, period, f, max_wait=None, max_period=None, scheduler=scheduler):
+        self.period = period  # quiet time (in seconds) after last call before the wrapped function is called
         self.f = f
-        self.t = None
+        self.max_wait = max_wait  # if set, call no later than this many seconds after first call of a burst, even if calls keep coming
+        self.max_period = max_period  # if set, period is stretched up to this while calls keep recurring just slower than period
+        self.scheduler = scheduler
+        self.lock = Lock()
+        self.pending = None  # (args, kwargs) of the last call
+        self.first_call = None  # when the pending burst started
+        self.last_call = None
+        self.interval = None  # moving average of time between calls
+        self.deadline = None  # when the pending call should be made
+        self.armed_at = None  # when our entry in scheduler is due; None if there's none
+        self.token = 0  # identifies our latest scheduler entry; older ones are ignored
+        self.stats = {
+            'calls'       : 0,
+            'invocations' : 0  # calls - invocations = no of coalesced/dropped calls
+        }
 
-    # force a reset of the timer, ie the next call will start new timer
+    # drop the pending call, if any
     def reset(self):
-        if self.t is not None:
-            self.t.cancel()
-            self.t = None
+        with self.lock:
+            self.pending = None
+            self.armed_at = None
+            self.token += 1
 
-    # TODO: do we want to call w/ first or last args? wouldn't it make sense for
-    # subsequent calls to reset the timer, and the f() to be called w/ last args?
     def __call__(self, *args, **kwargs):
-        def invoke():
-            self.t = None
-            self.f(*args, **kwargs)
+        now = monotonic()
+        with self.lock:
+            self.stats['calls'] += 1
+            if self.last_call is not None:
+                gap = now - self.last_call
+                self.interval = gap if self.interval is None else 0.7 * self.interval + 0.3 * gap
+            self.last_call = now
+
+            if self.pending is None:
+                self.first_call = now
+            self.pending = (args, kwargs)
+
+            self.deadline = now + self.current_period()
+            if self.max_wait is not None:
+                self.deadline = min(self.deadline, self.first_call + self.max_wait)
+
+            # note if deadline was pushed further, the current entry simply re-arms itself once due:
+            if self.armed_at is None or self.deadline < self.armed_at:
+                self._arm(self.deadline)
+
+    # period adapted to observed call rate: if calls recur about as often as
+    # period, we'd keep calling f() for each; so wait a bit longer than the
+    # average interval instead, up to max_period.
+    def current_period(self):
+        if self.max_period is None or self.interval is None or self.interval >= self.max_period:
+            return self.period
+        return min(self.max_period, max(self.period, 1.5 * self.interval))
+
+    def _arm(self, when):
+        self.token += 1
+        self.armed_at = when
+        self.scheduler.call_at(when, partial(self._fire, self.token))
+
+    def _fire(self, token):
+        with self.lock:
+            if token != self.token:  # superseded or reset
+                return
+            self.armed_at = None
+            if self.pending is None:
+                return
+            if monotonic() < self.deadline:
+                self._arm(self.deadline)
+                return
+
+            args, kwargs = self.pending
+            self.pending = None
+            self.stats['invocations'] += 1
 
-        if self.t is None:
-            self.t = Timer(self.period, invoke)
-            self.t.start()
+        self.f(*args, **kwargs)
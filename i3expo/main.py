@@ -6,56 +6,123 @@
 # add i3 conf:
 #   exec_always --no-startup-id i3expo
 #   for_window [class="^i3expo$"] fullscreen enable
-#   bindsym $mod1+e exec --no-startup-id killall -s SIGUSR1 i3expo
+#   bindsym $mod1+e exec --no-startup-id i3expo-ctl toggle
+
+import time
+T_IMPORT = time.perf_counter()  # for measuring time to first capture
 
 import os
 import sys
 import configparser
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'  # needs to be set prior to importing pygame; see https://github.com/pygame/pygame/issues/1468
-import pygame
 import i3ipc
 import copy
 import signal
 import traceback
 import pprint
-import time
 import math
+import zlib
+import json
+import queue
 import logging
+from . import debounce
 from .debounce import Debounce
-from functools import partial
-from threading import Thread
-from PIL import Image, ImageDraw
-import pulp
+from .thumbstore import ThumbnailStore
+from .bufpool import BufferPool
+from .refresh import RefreshScheduler, screen_locked
+from .tree import TreeModel
+from .strategy import StrategyPicker
+from .metrics import Metrics, default_stats_path
+from .pyramid import Pyramid
+from .ctl import ControlServer, default_socket_path
+from . import snapshot
+from functools import partial, lru_cache
+from threading import Thread, RLock
+from concurrent.futures import Future, ThreadPoolExecutor
 import ctypes
-import pickle
 from datetime import datetime
 from tendo import singleton
-# import prtscn_py
 
 from xdg.BaseDirectory import xdg_config_home
 
 SELF_WIN_CLASS = 'i3expo'
 pp = pprint.PrettyPrinter(indent=4)
 
-global_updates_running = True  # if false, we don't grab any screenshots/update internal state
+# ws knowledge fields mapped against their types; used to validate persisted state
+WS_FIELDS = {
+    'op': str, 'name': str, 'id': int, 'last-update': (int, float), 'state': int,
+    'x': int, 'y': int, 'w': int, 'h': int, 'ratio': (int, float), 'windows': dict,
+    'ff': (int, type(None)), 'fp': (int, type(None))
+}
 
+global_updates_running = True  # if false, we don't grab any screenshots/update internal state
+pygame = None  # UI-only, so imported lazily by import_ui(); keeps it off the capture path on startup
+UI_WAKE = None  # custom pygame event type for waking up input_event_loop() from other threads
+UI_WAKE_TIMEOUT_MS = 1000  # input_event_loop() re-checks its state at least this often regardless
+ui_requests = queue.SimpleQueue()  # functions to run on the main thread; see ui_dispatcher()
+ui_lock = RLock()  # guards ui_state, UI open/close transitions of global_updates_running & importing pygame
+ui_state = {'pending': False}  # whether UI is queued up to be shown
+event_core = None  # aio.EventCore w/ event_core = asyncio; None for threads
+ctl_server = None  # control socket server; see ctl.py
+tile_pool = None  # workers drawing tiles for render_frame(); None to draw them in place. Set up in hot_reload()
+tile_workers = 0
+
+buffers = BufferPool()  # capture buffers, recycled once thumbs no longer holds them
+thumbs = ThumbnailStore(release=buffers.release)  # ws num mapped against its [w, h, BGRA data] screenshot
+refresh = RefreshScheduler(10.0, 120.0)  # periodic refresh intervals of each ws; configured in hot_reload()
+CAPTURE_PER_REGION, CAPTURE_BOUNDING = 0, 1  # getScreensScaled() strategies; see prtscn.c
+capture_strategy = StrategyPicker([CAPTURE_PER_REGION, CAPTURE_BOUNDING])  # picked per layout of grabbed outputs
+LOCK_CHECK_TTL_SEC = 2.0  # how long screen lock status found by capture_paused() is trusted for
+lock_state = {'checked': 0.0, 'locked': False}
+capture_stats = {
+    'taken'   : 0,  # screenshots grabbed
+    'changed' : 0   # ...of which differed from the previous one of the same ws
+}
+metrics = Metrics()  # per-phase timings & counters; dumped to stats_f on SIGUSR2
 qm_cache = {}  # screen_w x screen_h mapped against rendered question mark for missing tiles
-LOCK = singleton.SingleInstance()
+font_cache = {}  # (font name, size) mapped against loaded pygame font; SysFont() lookups are slow
+label_cache = {}  # (font name, size, color, text) mapped against rendered ws name
+render_lock = RLock()  # guards frame_cache
+frame_cache = {
+    'geometry' : None,  # (screen_w, screen_h, ((ws num, ratio), ...)) tiles were laid out for
+    'grid'     : [],    # no of tiles per row
+    'tiles'    : {},    # tile index -> tile, as used by input_event_loop()
+    'frame'    : None,  # composed expo frame
+    'rendered' : {},    # ws num -> last rendered tile surfaces
+    'coarse'   : False  # whether any tiles were last drawn w/ coarse=True
+}
+pyramids = {}  # ws num -> (thumbnail version, Pyramid) tiles are scaled from; see pyramid.py
+ws_windows = {}  # ws num -> {window id: rect} as of its last capture w/ composite backend; see compose_ws()
+grab = None  # screenshot library; loaded in hot_reload()
+capture_backend = 'root'  # as per config; set in hot_reload()
 
 
 def shutdown_common():
     global global_updates_running
 
     logger.info('Shutting down...')
+    logger.info('thumbnail store stats: {}'.format(thumbs.get_stats()))
+    logger.info('capture stats: {}'.format(capture_stats))
+    logger.info('capture buffer stats: {}'.format(buffers.stats))
+    logger.info('tree model stats: {}'.format(tree_model.stats))
+    logger.info('capture strategies picked per layout: {}'.format(capture_strategy.best()))
+    logger.info('debounce stats: window events {}, ws events {}'.format(updater_debounced.stats, ws_update_debounced.stats))
+    logger.info('timings: {}'.format(metrics.snapshot()['timings']))
 
     try:
         global_updates_running = False
         updater_debounced.reset()
         ws_update_debounced.reset()
         i3.main_quit()
-
-        pygame.display.quit()
-        pygame.quit()
+        if event_core is not None:
+            event_core.stop()
+        grab.closeDisplay()
+        if ctl_server is not None:
+            ctl_server.stop()
+
+        if pygame is not None:
+            pygame.display.quit()
+            pygame.quit()
     except Exception as e:
         logger.error('exception on shutdown:')
         logger.error(e)
@@ -79,12 +146,22 @@ def load_global_knowledge() -> dict:
         return default
 
     try:
-        with open(state_f, 'rb') as f:
-            s = pickle.load(f)
-            t = s.get('timestamp', 0)
-
-            if (_unix_time_now() - t <= config.getint('CONF', 'max_persisted_state_age_sec')):
-                return s.get('gknowledge', default)
+        meta, sections = snapshot.read(state_f)
+        if _unix_time_now() - meta['timestamp'] > config.getint('CONF', 'max_persisted_state_age_sec'):
+            return default
+
+        # validate everything, as the file may have been tampered with:
+        gk = meta['gknowledge']
+        wss = {int(k): v for k, v in gk['wss'].items()
+               if isinstance(v, dict) and all(isinstance(v.get(f), t) for f, t in WS_FIELDS.items())}
+        if not isinstance(gk['active'], int) or not isinstance(gk['prev_f_w'], (str, type(None))):
+            return default
+        for v in wss.values():
+            v.setdefault('fp', None)  # not persisted by older versions
+
+        # note thumbnail data stays in the mmapped snapshot until first used:
+        thumbs.restore({int(k): v for k, v in sections.items() if int(k) in wss})
+        return {'active': gk['active'], 'prev_f_w': gk['prev_f_w'], 'wss': wss}
     except Exception as e:
         logger.error(e)
     return default
@@ -97,19 +174,11 @@ def persist_state():
 
     try:
         # pp.pprint(global_knowledge)
-        for k, v in global_knowledge['wss'].items():
-            i = v['screenshot']
-            # in order to pickle ctypes data, convert it into bytearray:
-            if i:
-                v['screenshot'][2] = bytearray(i[2])
-
-        data = {
+        meta = {
                 'timestamp':  _unix_time_now(),
                 'gknowledge': global_knowledge
                }
-
-        with open(config.get('CONF', 'state_f'), 'wb') as f:
-            pickle.dump(data, f)
+        snapshot.write(config.get('CONF', 'state_f'), meta, thumbs.export())
     except Exception as e:
         logger.error(e)
 
@@ -128,10 +197,28 @@ def signal_reload(signal, stack_frame):
     hot_reload()
 
 
+def signal_dump_stats(signal, stack_frame):
+    stats_f = config.get('CONF', 'stats_f')
+    try:
+        metrics.dump(stats_f)
+        logger.info('stats written to [{}]'.format(stats_f))
+    except Exception as e:
+        logger.error('writing stats to [{}] failed: {}'.format(stats_f, e))
+
+
 def hot_reload():
     global loop_interval
+    global update_delay
     global output_blacklist
     global win_class_blacklist
+    global thumbnail_size
+    global names_style
+    global damage_tracking
+    global idle_pause_ms
+    global screen_lockers
+    global tile_pool
+    global tile_workers
+    global capture_backend
     global grab
 
     read_config()
@@ -143,18 +230,85 @@ def hot_reload():
 
     # re-define global vars populated from config:
     loop_interval = config.getfloat('CONF', 'forced_update_interval_sec')
+    update_delay = config.getfloat('CONF', 'update_delay_sec')
     output_blacklist = [x.strip() for x in config.get('CONF', 'output_blacklist').split(',') if x and x.strip()]
     win_class_blacklist = [x.strip() for x in config.get('CONF', 'win_class_blacklist').split(',') if x and x.strip()]
     if SELF_WIN_CLASS not in win_class_blacklist:
         win_class_blacklist.append(SELF_WIN_CLASS)
+    thumbnail_size = parse_thumbnail_size(config.get('CONF', 'thumbnail_size'))
+    # note color is kept as raw string, as parsing it needs pygame:
+    names_style = (config.get('CONF', 'names_font'), config.getint('CONF', 'names_fontsize'), config.get('CONF', 'names_color'))
+    with render_lock:
+        frame_cache['geometry'] = None
+        frame_cache['rendered'].clear()
+        label_cache.clear()
+
+        workers = config.getint('CONF', 'tile_workers') or min(4, os.cpu_count() or 1)
+        if workers != tile_workers:
+            if tile_pool is not None:
+                tile_pool.shutdown(wait=False)
+            tile_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='i3expo-tile') if workers > 1 else None
+            tile_workers = workers
+    thumbs.mem_limit = config.getint('CONF', 'thumbnail_mem_limit_mb') * 1024 * 1024
+    thumbs.hot_count = config.getint('CONF', 'thumbnail_hot_count')
+    tree_model.max_age = config.getfloat('CONF', 'tree_max_age_sec')
+    refresh.min_interval = loop_interval
+    refresh.max_interval = max(loop_interval, config.getfloat('CONF', 'refresh_max_interval_sec'))
+    idle_pause_ms = config.getfloat('CONF', 'pause_when_idle_sec') * 1000
+    screen_lockers = {x.strip() for x in config.get('CONF', 'screen_lockers').split(',') if x and x.strip()}
+    lock_state['checked'] = 0.0
 
     screenshot_lib_path = config.get('CONF', 'screenshot_lib_path')
-    grab = ctypes.CDLL(screenshot_lib_path)
-    grab.getScreen.argtypes = []
-
-
-def shown_ws():
-    focused_op = i3.get_tree().find_focused().workspace().ipc_data['output']
+    prev_grab = grab if capture_backend == 'composite' else None  # whose redirection may need undoing below
+    lib = ctypes.CDLL(screenshot_lib_path)
+    if not hasattr(lib, 'getScreenScaled'):  # all grabs go through it, ie. there's nothing to fall back on
+        msg = ('screenshot library [{}] is outdated, lacking getScreenScaled; rebuild it from prtscn.c as per the '
+               'compile hint at its top'.format(screenshot_lib_path))
+        if grab is None:
+            sys.exit(msg)
+        logger.error(msg + '; keeping the one loaded before')
+        lib = grab
+        screenshot_lib_path = grab._name
+    grab = lib
+    # a library built from an older prtscn.c lacks some of the symbols; features needing them are disabled below:
+    missing = [f for f in ('getScreensScaled', 'idleTimeMs', 'damageTrack', 'damageQuery',
+                           'compositeRedirect', 'composeWindows') if not hasattr(grab, f)]
+    if missing:
+        logger.error('screenshot library [{}] is outdated, lacking {}; rebuild it from prtscn.c as per the compile '
+                     'hint at its top'.format(screenshot_lib_path, ', '.join(missing)))
+    if 'idleTimeMs' in missing:
+        idle_pause_ms = 0
+    else:
+        grab.idleTimeMs.restype = ctypes.c_long
+    if 'getScreensScaled' not in missing:  # otherwise grab_screens() grabs one output at a time
+        grab.getScreensScaled.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int),
+                                          ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte)), ctypes.c_int]
+    if 'composeWindows' not in missing:
+        grab.composeWindows.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_ulong)] + [ctypes.c_int] * 6 + [ctypes.POINTER(ctypes.c_ubyte)]
+
+    damage_tracking = config.getboolean('CONF', 'damage_tracking')
+    if damage_tracking and ('damageTrack' in missing or 'damageQuery' in missing):
+        damage_tracking = False
+    elif damage_tracking and grab.damageTrack() != 0:
+        logger.error('X Damage extension unavailable, disabling damage_tracking')
+        damage_tracking = False
+
+    capture_backend = config.get('CONF', 'capture_backend')
+    if capture_backend == 'composite' and ('compositeRedirect' in missing or 'composeWindows' in missing):
+        capture_backend = 'root'
+    elif capture_backend == 'composite' and grab.compositeRedirect() != 0:
+        logger.error('X Composite extension unavailable, falling back to capture_backend = root')
+        capture_backend = 'root'
+    # note the same library loaded again shares its state, ie. is still redirected:
+    if (prev_grab is not None and (capture_backend != 'composite' or prev_grab._name != grab._name)
+            and hasattr(prev_grab, 'compositeUnredirect')):
+        prev_grab.compositeUnredirect()
+    ws_windows.clear()
+
+
+def shown_ws(focused_op=None):
+    if focused_op is None:
+        focused_op = tree_model.tree().find_focused().workspace().ipc_data['output']
 
     # logger.debug(f"global_knowledge: {[type(i['op']) for i in global_knowledge['wss'].values()]}")
     # logger.debug(f"global_knowledge: {global_knowledge['wss']}")
@@ -163,31 +317,123 @@ def shown_ws():
 
 
 def signal_toggle_ui(signal, stack_frame):
+    request_ui('toggle')
+
+
+# asks for the UI to be shown/hidden/toggled; safe to call from any thread. Note
+# showing it is queued up for the main thread - see ui_dispatcher() - whereas
+# closing it merely flags input_event_loop() to return.
+def request_ui(action):
     global global_updates_running
 
-    if not global_updates_running:  # UI toggle
-        global_updates_running = 1  # make sure UI gets closed on workspace switch (including if we move cursor to neighboring WS when UI is rendered)
-                                    # note int type is to signify special condition to input_event_loop().
-        return
+    with ui_lock:
+        if not global_updates_running:  # UI is up
+            if action in ('toggle', 'hide'):
+                global_updates_running = 1  # make sure UI gets closed on workspace switch (including if we move cursor to neighboring WS when UI is rendered)
+                                            # note int type is to signify special condition to input_event_loop().
+                wake_ui()
+        elif action == 'show' or (action == 'toggle' and not ui_state['pending']):
+            if not ui_state['pending']:
+                ui_state['pending'] = True
+                ui_requests.put(open_ui)
+        else:  # toggled again before it got shown
+            ui_state['pending'] = False
+
+
+def open_ui():
+    global global_updates_running
 
-    wss = shown_ws()
-    if len(wss) > 1:  # i.e. should show UI
+    with ui_lock:
+        if not ui_state['pending']:
+            return
+        ui_state['pending'] = False
+        wss = shown_ws()
+        if len(wss) <= 1:  # i.e. nothing to choose from
+            return
         # i3.command('workspace i3expo-temporary-workspace')  # jump to temp ws; doesn't seem to work well in multimon setup; introduced by  https://gitlab.com/d.reis/i3expo/-/commit/d14685d16fd140b3a7374887ca086ea66e0388f5 - looks like it solves problem where fullscreen state is lost on expo toggle
         global_updates_running = False
         updater_debounced.reset()
         ws_update_debounced.reset()
 
-        # ui_thread = Thread(target = show_ui)
-        # ui_thread.daemon = True
+    show_ui(wss)
+
+
+# runs UI requests on the main thread, one at a time; pygame wants its display
+# driven from the thread that initialised it. Called last in run(), ie. once
+# events are subscribed to, so slow SDL init doesn't hold up anything else.
+def ui_dispatcher():
+    try:
+        init_ui_host()
+    except Exception as e:
+        logger.error('initialising UI host failed, retrying on first toggle: {}'.format(e))
+
+    while True:
+        f = ui_requests.get()
         try:
-            show_ui(wss)
+            f()
         except Exception as e:
-            # logger.error(e)
-            pass
+            logger.error('UI request [{}] failed: {}'.format(f.__name__, e))
 
 
 def get_color(raw):
-    return pygame.Color(raw)
+    return import_ui().Color(raw)
+
+
+# pygame, its display & font subsystems are set up only once with an unmapped
+# window kept around; show_ui() merely maps/unmaps it. Needs to run on the main
+# thread, as that's where ui_dispatcher() - and thus show_ui() - runs.
+def init_ui_host():
+    import_ui()
+    if not pygame.display.get_init():
+        t0 = time.perf_counter()
+        pygame.display.init()
+        pygame.display.set_caption(SELF_WIN_CLASS)
+        pygame.display.set_mode((1, 1), pygame.RESIZABLE | pygame.HIDDEN)
+        logger.debug('initialising UI host took {}'.format(time.perf_counter()-t0))
+
+
+def import_ui():
+    global pygame
+    global UI_WAKE
+
+    with ui_lock:  # warm_ui() & init_ui_host() race for it
+        if pygame is None:
+            t0 = time.perf_counter()
+            import pygame as pg
+            pg.font.init()
+            UI_WAKE = pg.event.custom_type()
+            pygame = pg
+            logger.debug('importing pygame took {}'.format(time.perf_counter()-t0))
+    return pygame
+
+
+# makes input_event_loop() re-check global_updates_running; safe to call from any thread
+def wake_ui():
+    if pygame is not None and pygame.display.get_init():
+        pygame.event.post(pygame.event.Event(UI_WAKE))
+
+
+# python signal handlers only run once the main thread returns from C code, ie.
+# they'd be stuck while input_event_loop() is blocked waiting for pygame events;
+# so we're notified of signals via signal.set_wakeup_fd() & wake up the loop.
+def signal_watcher(fd):
+    while True:
+        os.read(fd, 512)
+        wake_ui()
+
+
+# import UI modules & render ws name labels (SysFont scans all system fonts on
+# first use), then render the frame we skipped while pygame wasn't there yet
+def warm_ui():
+    try:
+        t0 = time.perf_counter()
+        import_ui()
+        for ws_num in list(global_knowledge['wss']):
+            prepare_label(ws_num)
+        logger.debug('warming up UI took {}'.format(time.perf_counter()-t0))
+        prerender_frame()
+    except Exception as e:
+        logger.error('warming up UI failed: {}'.format(e))
 
 
 def read_config():
@@ -206,7 +452,17 @@ def read_config():
             'frame_width_px'             : 3,
 
             'forced_update_interval_sec' : 10.0,
-            'debounce_period_sec'        : 1.0,
+            'refresh_max_interval_sec'   : 120.0,  # periodic refreshes of wss whose content doesn't change back off up to this
+            'pause_when_idle_sec'        : 300,  # stop grabbing after no user input for this long; 0 to disable
+            'screen_lockers'             : 'i3lock,xsecurelock,slock,xtrlock',  # no grabbing while any of these processes are running; comma-separated
+            'tree_max_age_sec'           : 30.0,  # local copy of i3 tree is re-fetched at least this often
+            'update_delay_sec'           : 0.2,  # time given for windows to redraw after an event before grabbing; system-specific
+            'event_core'                 : 'threads',  # 'threads', or 'asyncio' for a single event loop & worker thread; needs restart
+            'damage_tracking'            : False,  # if true, periodic updates only re-grab outputs whose contents changed
+            'capture_backend'            : 'root',  # 'root' to grab screen contents, or 'composite' to grab each window's own; see compose_ws()
+            'debounce_period_sec'        : 1.0,  # window events are processed once they've stopped coming for this long...
+            'debounce_max_wait_sec'      : 3.0,  # ...but no later than this after the first one
+            'debounce_max_period_sec'    : 3.0,  # debounce period is stretched up to this under steady streams of events
             'output_blacklist'           : '',  # comma-separated values as a string; empty string for none
             'win_class_blacklist'        : SELF_WIN_CLASS,  # comma-separated values as a string; empty string for none
 
@@ -215,10 +471,16 @@ def read_config():
             'names_fontsize'             : 25,
             'names_color'                : 'white',
             'highlight_percentage'       : 20,
+            'thumbnail_size'             : 'auto',  # 'auto' to size from the UI layout, 'off' for full resolution, or WxH bounding box
+            'thumbnail_mem_limit_mb'     : 0,  # least recently used thumbnails are dropped above this; 0 for no limit
+            'thumbnail_hot_count'        : 4,  # no of most recently used thumbnails kept uncompressed
+            'tile_workers'               : 0,  # threads drawing expo tiles after captures; 0 for one per cpu, up to 4
             'screenshot_lib_path'        : os.path.join(os.path.dirname(os.path.realpath(__file__)), 'prtscn.so'),
             'store_state_on_restart'     : True,
             'max_persisted_state_age_sec': 2,
             'state_f'                    : '/tmp/.' + SELF_WIN_CLASS + '.state',
+            'stats_f'                    : default_stats_path(),  # timings & counters are written here on SIGUSR2
+            'ctl_socket'                 : default_socket_path(),  # control socket for i3expo-ctl; empty string to disable; needs restart
             'log_lvl'                    : 'INFO'
         }
     })
@@ -234,14 +496,151 @@ def read_config():
             # config.write(f)
 
 
+def parse_thumbnail_size(raw):
+    raw = raw.strip().lower()
+    if raw in ('auto', 'off'):
+        return raw
+    try:
+        w, h = (int(x) for x in raw.split('x'))
+        if w > 0 and h > 0:
+            return w, h
+    except ValueError:
+        pass
+    logger.error('invalid thumbnail_size [{}], falling back to auto'.format(raw))
+    return 'auto'
+
+
+# size to store screenshots of a w x h ws on given output at. For 'auto', that's
+# its tile size in the UI as opened from that output, ie. w/ the wss shown there.
+def get_thumbnail_size(w, h, op):
+    if thumbnail_size == 'off':
+        return w, h
+    elif thumbnail_size == 'auto':
+        shown = [global_knowledge['wss'][n] for n in shown_ws(op)]
+        screen_w = max(v['w'] for v in shown)
+        screen_h = max(v['h'] for v in shown)
+        no_of_tiles = max(2, len(shown))  # UI is never shown for a single ws
+
+        grid_layout = tuple(resolve_grid_layout(screen_w, screen_h, range(no_of_tiles)))
+        pad_w, pad_h, spacing_x, spacing_y = get_layout_spacing(screen_w, screen_h)
+        max_tile_w, max_tile_h = get_max_tile_dimensions(screen_w, screen_h, pad_w, pad_h, spacing_x, spacing_y, grid_layout)
+
+        # mirrors tile sizing in layout_tiles():
+        scale = max_tile_h / h if screen_w > screen_h else max_tile_w / w
+    else:
+        scale = min(thumbnail_size[0] / w, thumbnail_size[1] / h)
+
+    if scale >= 1:
+        return w, h
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
 def grab_screen(i):
     # logger.debug('GRABBING FOR: {}'.format(i['name']))
     w = i['w']
     h = i['h']
-
-    result = (ctypes.c_ubyte * w * h * 3)()  # *3 for R,G,B
-    grab.getScreen(i['x'], i['y'], w, h, result)
-    return [w, h, result]
+    tw, th = get_thumbnail_size(w, h, i['op'])
+
+    if damage_tracking:  # whatever changes from here on is for the next grab to pick up
+        grab.damageQuery(i['x'], i['y'], w, h, 1)
+    result = buffers.acquire(tw, th)
+    if grab.getScreenScaled(i['x'], i['y'], w, h, tw, th, result) != 0:
+        logger.error('grabbing screen for WS [{}] failed'.format(i['name']))
+        buffers.release(tw, th, result)
+        return None
+    return [tw, th, result]
+
+
+# grab screenshots of all given wss in one go; returns [tw, th, buf] or None for each.
+# note ctypes releases the GIL for the duration of the call.
+def grab_screens(wks):
+    if len(wks) == 1 or not hasattr(grab, 'getScreensScaled'):  # latter for outdated libs; see hot_reload()
+        return [grab_screen(i) for i in wks]
+
+    n = len(wks)
+    rects = (ctypes.c_int * (n * 6))()
+    bufs = (ctypes.POINTER(ctypes.c_ubyte) * n)()
+    shots = []
+    for idx, i in enumerate(wks):
+        tw, th = get_thumbnail_size(i['w'], i['h'], i['op'])
+        rects[idx*6:idx*6 + 6] = [i['x'], i['y'], i['w'], i['h'], tw, th]
+        result = buffers.acquire(tw, th)
+        bufs[idx] = ctypes.cast(result, ctypes.POINTER(ctypes.c_ubyte))
+        shots.append([tw, th, result])
+        if damage_tracking:  # whatever changes from here on is for the next grab to pick up
+            grab.damageQuery(i['x'], i['y'], i['w'], i['h'], 1)
+
+    layout = tuple((i['x'], i['y'], i['w'], i['h']) for i in wks)
+    strategy = capture_strategy.pick(layout)
+    t0 = time.perf_counter()
+    rc = grab.getScreensScaled(n, rects, bufs, strategy)
+    if rc == 0:  # failed ones cost whatever, so they'd only skew the picker
+        capture_strategy.record(layout, strategy, time.perf_counter() - t0)
+    else:
+        logger.error('grabbing screens for WSs {} failed'.format([i['name'] for i in wks]))
+        for shot in shots:
+            buffers.release(*shot)
+        return [None] * n
+    return shots
+
+
+# composite capture_backend: ws is drawn from its windows' own contents (see
+# composeWindows() in prtscn.c), so popups, notifications & the like stacked on
+# top of them aren't baked in. w/ damage_tracking, & as long as no window was
+# opened, closed or moved, only windows whose area was damaged are re-drawn onto
+# a copy of the previous screenshot; otherwise it's drawn anew, on top of a
+# regular grab for what's not covered by windows, eg. bars & wallpaper.
+# Note i3 unmaps windows of hidden workspaces & tabs, leaving nothing to draw
+# them from; ie. as w/ the root backend, only visible workspaces are refreshed.
+def compose_ws(ws, wk):
+    x, y, w, h = wk['x'], wk['y'], wk['w'], wk['h']
+    tw, th = get_thumbnail_size(w, h, wk['op'])
+
+    floating = {c.id for f in ws.floating_nodes for c in f.leaves()}
+    leaves = sorted((c for c in ws.leaves() if c.window and c.window_class not in win_class_blacklist),
+                    key=lambda c: c.id in floating)  # floating ones on top
+    rects = {c.window: (c.rect.x, c.rect.y, c.rect.width, c.rect.height) for c in leaves}
+
+    prev = thumbs.borrow(ws.num)
+    result = buffers.acquire(tw, th)
+    if damage_tracking and prev is not None and prev[:2] == [tw, th] and ws_windows.get(ws.num) == rects:
+        memoryview(result).cast('B')[:] = memoryview(prev[2]).cast('B')
+        thumbs.give_back(prev)
+        damaged = {c.window for c in leaves if grab.damageQuery(*rects[c.window], 1) != 0}
+        if damaged:  # floating windows may overlap re-drawn ones
+            damaged |= {c.window for c in leaves if c.id in floating}
+        wins = [c.window for c in leaves if c.window in damaged]
+    else:
+        if prev is not None:
+            thumbs.give_back(prev)
+        if damage_tracking:
+            grab.damageQuery(x, y, w, h, 1)
+        if grab.getScreenScaled(x, y, w, h, tw, th, result) != 0:
+            logger.error('grabbing screen for WS [{}] failed'.format(wk['name']))
+            buffers.release(tw, th, result)
+            return None
+        wins = [c.window for c in leaves]
+
+    failed = grab.composeWindows(len(wins), (ctypes.c_ulong * len(wins))(*wins), x, y, w, h, tw, th, result)
+    if failed < 0:
+        logger.error('composing WS [{}] from its windows failed'.format(wk['name']))
+        buffers.release(tw, th, result)
+        return None
+    elif failed:
+        logger.debug('{} of {} windows of WS [{}] not drawn, eg. hidden tabs'.format(failed, len(wins), wk['name']))
+    if damage_tracking:  # eg. bars; not drawn from windows, but no reason to force re-capturing for
+        grab.damageQuery(x, y, w, h, 1)
+
+    metrics.incr('composed_windows', len(wins) - failed)
+    ws_windows[ws.num] = rects
+    return [tw, th, result]
+
+
+# cheap checksum of a [w, h, data] screenshot, to tell whether it differs from
+# the previous one. Note it covers all of the (downscaled) data, as sampling
+# could miss eg. a single changed line of text.
+def fingerprint(shot) -> int:
+    return zlib.crc32(shot[2], zlib.crc32('{}x{}'.format(shot[0], shot[1]).encode()))
 
 
 def update_workspace(ws, focused_ws, hydration=False) -> dict:
@@ -251,7 +650,6 @@ def update_workspace(ws, focused_ws, hydration=False) -> dict:
             'op'          : ws.ipc_data['output'],
             'name'        : ws.name,
             'id'          : ws.id,
-            'screenshot'  : [],    # array of [w,h,byte-array representation of this ws screenshot]
             'last-update' : 0.0,   # unix epoch when ws was last grabbed
             'state'       : 0,     # numeric representation of current state of ws - windows and their sizes/is focused et al
             'x'           : 0,
@@ -260,7 +658,8 @@ def update_workspace(ws, focused_ws, hydration=False) -> dict:
             'h'           : 0,
             'ratio'       : 0.0,
             'windows'     : {},    # TODO unused atm
-            'ff'          : None   # float-focus; ID of a floating window to focus when we return to this WS
+            'ff'          : None,  # float-focus; ID of a floating window to focus when we return to this WS
+            'fp'          : None   # fingerprint of last screenshot; see fingerprint()
         }
 
     # some data should not be set on first state hydration, e.g. missing polybar
@@ -290,7 +689,7 @@ def init_knowledge():
     global_knowledge = load_global_knowledge()
     state_hydration = global_knowledge['active'] != -1
 
-    tree = i3.get_tree()
+    tree = tree_model.tree()
     focused_ws = tree.find_focused().workspace()
 
     for ws in tree.workspaces():
@@ -298,10 +697,8 @@ def init_knowledge():
         update_workspace(ws, focused_ws, state_hydration)
 
 
-# TODO: instead of querying i3.get_outputs(), consider subscribing to 'output' event
-#       and maintaining internal output list/state
 def get_all_active_workspaces(i3, focused_ws):
-    return [output.current_workspace for output in i3.get_outputs()
+    return [output.current_workspace for output in tree_model.outputs()
             # if output.active and output.name not in output_blacklist]
             if output.active and (focused_ws.name == output.current_workspace or output.name not in output_blacklist)]
 
@@ -324,28 +721,53 @@ def update_tree_state(ws, wk):
     return True
 
 
+# no point grabbing while screen is locked (we'd only capture the locker), or
+# while nobody's around to look at it
+def capture_paused() -> bool:
+    now = time.monotonic()
+    if screen_lockers and now - lock_state['checked'] > LOCK_CHECK_TTL_SEC:
+        lock_state['locked'] = screen_locked(screen_lockers)
+        lock_state['checked'] = now
+    if lock_state['locked']:
+        return True
+    return idle_pause_ms > 0 and grab.idleTimeMs() >= idle_pause_ms  # note -1 means unknown
+
+
 def should_update_ws(rate_limit_period, ws, wk, t, force):
     if rate_limit_period is not None and t - wk['last-update'] <= rate_limit_period:
         return False
-    return update_tree_state(ws, wk) or force
+    with metrics.timer('tree_state'):
+        changed = update_tree_state(ws, wk)
+    return changed or force
 
 
+# damaged_only: with damage_tracking, force only those wss whose output region has changed
+# settle: sleep for update_delay_sec first; asyncio core schedules the delay itself instead
+# scheduled: only process wss whose periodic refresh is due as per refresh scheduler
+# only: if given, process only wss of these nums
 def update_state(i3, e=None, rate_limit_period=None,
                  force=False, debounced=False,
-                 all_active_ws=False):
+                 all_active_ws=False, damaged_only=False,
+                 settle=True, scheduled=False, only=None):
     logger.debug('[ TOGGLING updat_state(){}; force: {}, debounced: {}'.format(' by event [' + e.change + ']' if e else '', force, debounced))
 
-    time.sleep(0.2)  # TODO system-specific; configurize? also, maybe only sleep if it's _not_ debounced?
+    if settle:
+        time.sleep(update_delay)  # TODO: maybe only sleep if it's _not_ debounced?
 
-    tree = i3.get_tree()
+    tree = tree_model.tree()
     focused_con = tree.find_focused()
 
     if (not global_updates_running or
         focused_con.window_class in win_class_blacklist):  # note assumes WindowEvent
             logger.debug('] update skipped')
+            metrics.incr('updates_skipped')
             updater_debounced.reset()
             ws_update_debounced.reset()
             return
+    elif capture_paused():
+        logger.debug('] update skipped, screen is locked or user is idle')
+        metrics.incr('updates_paused')
+        return
 
     t0 = time.time()
     focused_ws = focused_con.workspace()
@@ -359,36 +781,56 @@ def update_state(i3, e=None, rate_limit_period=None,
     else:  # update/process only the currently focused ws
         wss = [focused_ws]
 
-    # either use our legacy grabbing logic...: {
+    to_grab = []
     for ws in wss:
+        if only is not None and ws.num not in only:
+            continue
         wk = update_workspace(ws, focused_ws)
-        if should_update_ws(rate_limit_period, ws, wk, t0, force):
-            t1 = time.time()
-            wk['screenshot'] = grab_screen(wk)
-            logger.debug('  -> grabbing WS {} image took {}'.format(ws.num, time.time()-t1))
+        # stored screenshot sized for a since changed UI layout (eg. before another ws was opened) is re-grabbed right away:
+        stale = thumbs.size(ws.num) not in (None, get_thumbnail_size(wk['w'], wk['h'], wk['op']))
+        if scheduled and not stale and not refresh.due(ws.num, t0):
+            continue
+        ws_force = force
+        if damaged_only and damage_tracking:
+            ws_force = grab.damageQuery(wk['x'], wk['y'], wk['w'], wk['h'], 0) != 0  # note -1 means unknown
+        if should_update_ws(None if stale else rate_limit_period, ws, wk, t0, ws_force or stale):
+            to_grab.append((ws, wk))
+        elif scheduled:
+            refresh.record(ws.num, False, t0)
+
+    shots = []
+    if to_grab:
+        t1 = time.perf_counter()
+        if capture_backend == 'composite':
+            shots = [compose_ws(ws, wk) for ws, wk in to_grab]
+        else:
+            shots = grab_screens([wk for _, wk in to_grab])
+        t1 = time.perf_counter() - t1
+        metrics.observe('grab', t1)
+        logger.debug('  -> grabbing WS {} image{} took {}'.format([ws.num for ws, _ in to_grab], 's' if len(to_grab) > 1 else '', t1))
+
+    grabbed = False
+    for (ws, wk), shot in zip(to_grab, shots):
+        if shot:
             wk['last-update'] = t0
+            capture_stats['taken'] += 1
+            fp = fingerprint(shot)
+            # unchanged screenshots are dropped, so nothing downstream gets invalidated:
+            changed = fp != wk['fp'] or ws.num not in thumbs
+            if changed:
+                wk['fp'] = fp
+                thumbs.put(ws.num, shot)
+                capture_stats['changed'] += 1
+                grabbed = True
+            else:
+                buffers.release(*shot)
+            refresh.record(ws.num, changed, t0)
 
-    # } ...or new py-bindings: {  # this seems to be slower, for whatever the reason
-    # params = []
-    # ws_to_process = []
-    # for ws in wss:
-        # update_workspace(ws, focused_ws)
-        # if should_update_ws(rate_limit_period, ws, force):
-            # i = global_knowledge['wss'][ws.num]
-            # params += [i['x'], i['y'], i['w'], i['h']]
-            # ws_to_process.append(i)
-
-    # if params:
-        # t1 = time.time()
-        # screenshots = prtscn_py.get_screens(*params)
-        # logger.debug('  -> grabbing {} WS{} took {}'.format(len(ws_to_process), 'es' if len(ws_to_process) > 1 else '', time.time()-t1))
-
-        # for idx, ws_state in enumerate(ws_to_process):
-            # ws_state['screenshot'] = screenshots[idx]
-            # ws_state['last-update'] = t0
-    # }
+    if grabbed:
+        prerender_frame(focused_ws.ipc_data['output'])
 
-    logger.debug('] whole update_state() took {}'.format(time.time()-t0))
+    metrics.observe('update_state', time.time() - t0)
+    logger.debug('] whole update_state() took {}; capture stats: {}'.format(time.time()-t0, capture_stats))
 
 
 def get_hovered_tile(mpos, tiles):
@@ -404,77 +846,42 @@ def get_hovered_tile(mpos, tiles):
 def show_ui(wss):
     global global_updates_running
 
-    pre_expo_focused_win_id = i3.get_tree().find_focused().id
-
-    frame_active_color = config.getcolor('CONF', 'frame_active_color')
-    frame_inactive_color = config.getcolor('CONF', 'frame_inactive_color')
-    frame_missing_color = config.getcolor('CONF', 'frame_missing_color')
-    tile_missing_color = config.getcolor('CONF', 'tile_missing_color')
+    t0 = time.perf_counter()
+    pre_expo_focused_win_id = tree_model.tree().find_focused().id
 
-    pygame.display.init()
-    pygame.font.init()
+    init_ui_host()  # normally a no-op, as it's done on startup
 
     ws = global_knowledge['wss'][global_knowledge['active']]
 
-    screen = pygame.display.set_mode((ws['w'], ws['h']), pygame.RESIZABLE)
-    pygame.display.set_caption(SELF_WIN_CLASS)
+    # (re-)mapping the window makes i3 manage it anew, ie. for_window rules still apply:
+    screen = pygame.display.set_mode((ws['w'], ws['h']), pygame.RESIZABLE | pygame.SHOWN)
+    pygame.event.clear()  # drop whatever was queued while we were hidden
 
-    tiles = {}  # contains grid tile index to thumbnail/ws_screenshot data mappings
-    active_tile = None
-
-    wss.sort()
-    wss2 = list(wss)  # shallow copy
-
-    grid_layout = resolve_grid_layout(ws['w'], ws['h'], wss2)
-
-    grid = []
+    with render_lock:
+        # normally a no-op, as the frame is kept up-to-date in the background; otherwise
+        # stale tiles are drawn coarse first, so there's something to show right away:
+        fc = render_frame(wss, coarse=True)
+        screen.blit(fc['frame'], (0, 0))
+        pygame.display.flip()  # update full dispaly Surface on the screen
+        metrics.observe('ui_first_frame', time.perf_counter() - t0)
+        logger.debug('UI shown in {}'.format(time.perf_counter()-t0))
 
-    # compose the grid:
-    for row_idx, elements_in_row in enumerate(grid_layout):
-        no_of_previous_tiles = sum(grid_layout[:row_idx])
-        row = []
-        grid.append(row)
+        if fc['coarse']:  # ...then refined
+            fc = render_frame(wss)
+            screen.blit(fc['frame'], (0, 0))
+            pygame.display.flip()
+            metrics.observe('ui_refined_frame', time.perf_counter() - t0)
 
-        for curr_tile_on_row_idx in range(elements_in_row):
-            index = no_of_previous_tiles + curr_tile_on_row_idx
-            ws_num = wss.pop(0)
-            t = {
-                'active'    : False,
-                'mouseoff'  : None,
-                'mouseon'   : None,
-                'ul'        : (-1, -1),  # upper-left coords (including frame/border);
-                'br'        : (-1, -1),  # bottom-right coords (including frame/border);
-                'row_idx'   : row_idx,
-                'ws'        : ws_num,        # workspace.num this tile represents;
-                'frame_col' : None,
-                'tile_col'  : None,
-                'img'       : None  # processed, ie pygame-ready thumbnail;
-            }
-            tiles[index] = t
-            row.append(t)
-
-            ws_conf = global_knowledge['wss'][ws_num]
-
-            if ws_conf['screenshot']:
-                # t0 = time.time()
-                t['img'] = process_img(ws_conf['screenshot'])
-                # logger.debug('processing image took {}'.format(time.time()-t0))
-                if global_knowledge['active'] == ws_num:
-                    active_tile = index  # first highlight our current ws
-                    t['frame_col'] = frame_active_color
-                else:
-                    t['frame_col'] = frame_inactive_color
-            else:
-                t['frame_col'] = frame_missing_color
-                t['tile_col'] = tile_missing_color
-                t['img'] = draw_missing_tile(ws_conf['w'], ws_conf['h'])
+        grid_layout = fc['grid']
+        # shallow copies, as input_event_loop() marks them active:
+        tiles = {i: dict(t, active=False) for i, t in fc['tiles'].items()}
 
+    # first highlight our current ws:
+    active_tile = next((i for i, t in tiles.items()
+                        if t['ws'] == global_knowledge['active'] and not t['missing']), None)
 
-    draw_grid(screen, grid)
-    pygame.display.flip()  # update full dispaly Surface on the screen
-    i = input_event_loop(screen, tiles, active_tile, grid_layout, wss2)
-    pygame.display.quit()
-    pygame.quit()
+    i = input_event_loop(screen, tiles, active_tile, grid_layout, sorted(wss))
+    pygame.display.set_mode((ws['w'], ws['h']), pygame.RESIZABLE | pygame.HIDDEN)  # unmap, but keep the window
 
     # restore focus on previously focused window if we didn't switch WS; otherwise
     # the focus will likely be stolen from a floating/stacked window:
@@ -486,10 +893,191 @@ def show_ui(wss):
         i3.command(i)
 
 
+# keep the expo frame of currently shown workspaces rendered, so opening the UI
+# is just a blit; safe to call from any thread.
+def prerender_frame(focused_op=None):
+    if pygame is None:  # not warmed up yet; warm_ui() will call us once it is
+        return
+
+    try:
+        wss = shown_ws(focused_op)
+        if len(wss) > 1:
+            render_frame(wss, skip_cold=bool(thumbs.mem_limit))
+    except Exception as e:
+        logger.error('pre-rendering expo frame failed: {}'.format(e))
+
+
+# composes the expo frame for given workspaces into frame_cache, re-rendering
+# only the tiles whose screenshot, name, size or highlight changed since last call.
+# coarse: draw those tiles fast but blocky; they're re-drawn properly on next call
+# skip_cold: don't draw tiles of wss whose screenshot thumbs has compressed, and
+#            drop what's drawn of them; ie. leave those to be drawn once the UI
+#            is opened, as they'd otherwise be kept decompressed & rendered
+#            beyond thumbnail_mem_limit_mb. Frame is left un-composed if any.
+#            Pyramids of evicted wss are dropped as well
+def render_frame(wss, coarse=False, skip_cold=False):
+    ws = global_knowledge['wss'][global_knowledge['active']]
+    screen_w = ws['w']
+    screen_h = ws['h']
+    wss = sorted(wss)
+
+    with render_lock:
+        if not pygame.font.get_init():
+            pygame.font.init()
+
+        fc = frame_cache
+        geometry = (screen_w, screen_h, tuple((n, global_knowledge['wss'][n]['ratio']) for n in wss))
+        if fc['geometry'] != geometry:
+            with metrics.timer('layout'):
+                fc['geometry'] = geometry
+                fc['grid'] = resolve_grid_layout(screen_w, screen_h, wss)
+                fc['tiles'] = layout_tiles(screen_w, screen_h, fc['grid'], wss)
+                fc['frame'] = None
+
+        if skip_cold:
+            for n in wss:
+                if n not in thumbs:  # evicted; its tile is drawn as missing
+                    pyramids.pop(n, None)
+        cold = {t['ws'] for t in fc['tiles'].values() if skip_cold and thumbs.is_cold(t['ws'])}
+        for t in fc['tiles'].values():
+            if t['ws'] in cold:
+                fc['rendered'].pop(t['ws'], None)
+                pyramids.pop(t['ws'], None)
+                t['mouseoff'] = t['mouseon'] = None
+        if cold:
+            fc['frame'] = None
+
+        changed = fc['frame'] is None
+        t0 = time.perf_counter()
+        drawing = {}  # ws num -> (key, future) of tiles being re-drawn
+        for t in fc['tiles'].values():
+            if t['ws'] in cold:
+                continue
+            key = tile_key(t)
+            r = fc['rendered'].get(t['ws'])
+            if (r is None or r['key'] != key) and t['ws'] not in drawing:
+                drawing[t['ws']] = (key, submit_tile(t['ws'], key, coarse))
+        for ws_num, (key, future) in drawing.items():
+            r = fc['rendered'][ws_num] = future.result()
+            r['key'] = None if coarse else key
+            r['label'] = render_workspace_name(key[1]) if config.getboolean('CONF', 'names_show') else None
+        if drawing:
+            metrics.observe('draw_tiles_coarse' if coarse else 'draw_tiles', time.perf_counter() - t0)
+        fc['coarse'] = coarse and bool(drawing)
+        if cold:
+            return fc
+
+        for t in fc['tiles'].values():
+            changed |= apply_tile(t)
+
+        if changed:
+            t0 = time.perf_counter()
+            if fc['frame'] is None:
+                fc['frame'] = pygame.Surface((screen_w, screen_h))
+            fc['frame'].fill(config.getcolor('CONF', 'bgcolor'))
+            for t in fc['tiles'].values():
+                fc['frame'].blit(t['mouseoff'], t['ul'])
+                if t['label'] is not None:
+                    fc['frame'].blit(t['label'], t['label_pos'])
+            metrics.observe('compose', time.perf_counter() - t0)
+            logger.debug('expo frame re-composed')
+        return fc
+
+
+# what given tile should currently show; it's re-drawn whenever this changes
+def tile_key(t):
+    ws_num = t['ws']
+    return (thumbs.version(ws_num), get_workspace_name(ws_num), global_knowledge['active'] == ws_num,
+            round(t['w']), round(t['h']))
+
+
+# draws tile of given ws on tile_pool; returns its future. Only screenshots are
+# drawn on the pool, as it's pure pixel work & pygame releases the GIL for it,
+# whereas missing tiles need fonts, which are drawn here under render_lock.
+# The screenshot is borrowed from thumbs till the tile is drawn, as it's drawn
+# from zero-copy, ie. its buffer mustn't be recycled for a new capture meanwhile.
+def submit_tile(ws_num, key, coarse=False):
+    version, _, is_active, w, h = key
+    shot = thumbs.borrow(ws_num) if version is not None else None
+    if shot and tile_pool is not None:
+        future = tile_pool.submit(draw_tile, ws_num, shot, version, is_active, w, h, coarse)
+        future.add_done_callback(lambda _: thumbs.give_back(shot))
+        return future
+
+    future = Future()
+    try:
+        future.set_result(draw_tile(ws_num, shot, version, is_active, w, h, coarse))
+    finally:
+        if shot:
+            thumbs.give_back(shot)
+    return future
+
+
+# points tile at its rendered surfaces if they've changed; returns True if they did.
+def apply_tile(t):
+    r = frame_cache['rendered'][t['ws']]
+    if t['mouseoff'] is r['mouseoff']:
+        return False
+
+    t['missing'] = r['missing']
+    t['mouseoff'] = r['mouseoff']
+    t['mouseon'] = r['mouseon']
+    t['label'] = r['label']
+    if r['label'] is not None:
+        name_width = r['label'].get_rect().size[0]
+        t['label_pos'] = (t['ul'][0] + round((t['w'] - name_width) / 2),
+                          t['ul'][1] + round(t['h']) + round(t['h'] * 0.02))
+    return True
+
+
+# draws tile surfaces, sans label; shot is None for a missing one. Safe to call
+# from tile_pool workers for tiles w/ a shot, as long as it's one at a time per ws.
+# coarse: scale w/ nearest neighbour instead of smoothing; several times faster
+def draw_tile(ws_num, shot, version, is_active, tile_w, tile_h, coarse=False):
+    t0 = time.perf_counter()
+    frame_width = config.getint('CONF', 'frame_width_px')
+    highlight_percentage = config.getint('CONF', 'highlight_percentage')
+    ws_conf = global_knowledge['wss'][ws_num]
+
+    img_w = max(0, tile_w - 2*frame_width)  # note we need to adjust for frame/border width
+    img_h = max(0, tile_h - 2*frame_width)
+    mouseoff = pygame.Surface((tile_w, tile_h))  # used to replace mouseon highlight
+    if shot:
+        with metrics.timer('convert'):
+            img = process_img(shot)
+            p = pyramids.get(ws_num)
+            if p is None or p[0] != version:
+                p = pyramids[ws_num] = (version, Pyramid((shot[0], shot[1]), pygame.transform.smoothscale))
+            img = p[1].get(img, img_w, img_h, build=not coarse)
+        mouseoff.fill(config.getcolor('CONF', 'frame_active_color' if is_active else 'frame_inactive_color'))
+    else:
+        img = draw_missing_tile(ws_conf['w'], ws_conf['h'])
+        mouseoff.fill(config.getcolor('CONF', 'frame_missing_color'))
+        mouseoff.fill(config.getcolor('CONF', 'tile_missing_color'),
+                      (frame_width, frame_width, tile_w - 2*frame_width, tile_h - 2*frame_width))
+
+    # draw ws thumbnail
+    with metrics.timer('scale'):
+        img = (pygame.transform.scale if coarse else pygame.transform.smoothscale)(img, (img_w, img_h))
+    mouseoff.blit(img, (frame_width, frame_width))
+
+    mouseon = mouseoff.copy()
+    lightmask = pygame.Surface((tile_w, tile_h), pygame.SRCALPHA, 32)
+    lightmask.fill((255,255,255,255 * highlight_percentage / 100))
+    mouseon.blit(lightmask, (0, 0))
+
+    metrics.observe('draw_tile', time.perf_counter() - t0)
+    return {
+        'missing'  : not shot,
+        'mouseoff' : mouseoff,
+        'mouseon'  : mouseon
+    }
+
+
+# note the surface shares the screenshot's buffer, ie no copying takes place;
+# so shot must be borrowed from thumbs for as long as the surface is used
 def process_img(shot):
-    pil = Image.frombuffer('RGB', (shot[0], shot[1]), shot[2], 'raw', 'RGB', 0, 1)
-    # return pygame.image.fromstring(pil.tobytes(), pil.size, pil.mode)
-    return pygame.image.frombuffer(pil.tobytes(), pil.size, pil.mode)  # frombuffer() potentially faster than .fromstring()
+    return pygame.image.frombuffer(shot[2], (shot[0], shot[1]), 'BGRA')
 
 
 def draw_missing_tile(screen_w, screen_h):
@@ -499,8 +1087,7 @@ def draw_missing_tile(screen_w, screen_h):
         return qm_cache[key]
 
     missing_tile = pygame.Surface((screen_w, screen_h), pygame.SRCALPHA, 32)
-    missing_tile = missing_tile.convert_alpha()
-    qm = pygame.font.SysFont('sans-serif', screen_h).render('?', True, (150, 150, 150))
+    qm = get_font('sans-serif', screen_h).render('?', True, (150, 150, 150))
     qm_size = qm.get_rect().size
     origin_x = round((screen_w - qm_size[0])/2)
     origin_y = round((screen_h - qm_size[1])/2)
@@ -511,79 +1098,99 @@ def draw_missing_tile(screen_w, screen_h):
     return missing_tile
 
 
-def get_max_tile_dimensions(screen_w, screen_h, pad_w, pad_h, spacing_x, spacing_y, grid):
+# max tile_w is bound by two constraints:
+#   r * rows * tile_w + (rows-1) * spacing_y + 2*pad_h <= screen_h
+#   cols * tile_w + (cols-1) * spacing_x + 2*pad_w <= screen_w
+# where cols is the longest row; ie. it's the smaller of the two solutions.
+# grid_layout is a tuple of tiles per row.
+@lru_cache(maxsize=64)
+def get_max_tile_dimensions(screen_w, screen_h, pad_w, pad_h, spacing_x, spacing_y, grid_layout):
     # if (screen_w > screen_h):  # TODO
-    max_row_len = max([len(row) for row in grid])
+    rows = len(grid_layout)
+    cols = max(grid_layout)
     r = screen_h / screen_w
 
-    # find tile width:
-    problem = pulp.LpProblem('optimalTileWidth', pulp.LpMaximize)
-    max_tile_w = pulp.LpVariable('max_tile_w', lowBound = 0)
-    problem += max_tile_w
-    problem += r * len(grid) * max_tile_w + (len(grid)-1) * spacing_y + 2*pad_h <= screen_h
-    problem += max_row_len*max_tile_w + (max_row_len-1)*spacing_x + 2*pad_w <= screen_w
-
-    result = problem.solve()
-    assert result == pulp.LpStatusOptimal
-    max_tile_w = max_tile_w.value()
+    max_tile_w = max(0, min(
+        (screen_h - (rows-1)*spacing_y - 2*pad_h) / (r * rows),
+        (screen_w - (cols-1)*spacing_x - 2*pad_w) / cols
+    ))
     max_tile_h = max_tile_w * r
 
     return max_tile_w, max_tile_h
 
 
-def render_workspace_name(tile, screen, origin_x, origin_y, tile_w, tile_h):
+# name is the one i3 knows ws by; looked up from global_knowledge if not given
+def get_workspace_name(ws_num, name=None):
     try:
         # check if name for given ws has been hardcoded in our config:
-        name = config.get('CONF', 'workspace_' + str(tile['ws']))
+        return config.get('CONF', 'workspace_' + str(ws_num))
     except Exception:
-        name = global_knowledge['wss'][tile['ws']]['name']
+        return name if name is not None else global_knowledge['wss'][ws_num]['name']
 
-    highlight_percentage = config.getint('CONF', 'highlight_percentage')
-    names_color = config.getcolor('CONF', 'names_color')
-    names_font = config.get('CONF', 'names_font')
-    names_fontsize = config.getint('CONF', 'names_fontsize')
-    font = pygame.font.SysFont(names_font, names_fontsize)
 
-    name = font.render(name, True, names_color)
-    name_width = name.get_rect().size[0]
-    name_x = origin_x + round((tile_w - name_width) / 2)
-    name_y = origin_y + round(tile_h) + round(tile_h * 0.02)
-    screen.blit(name, (name_x, name_y))
+def get_font(name, size):
+    key = (name, size)
+    if key not in font_cache:
+        font_cache[key] = pygame.font.SysFont(name, size)
+    return font_cache[key]
+
 
+# note returned surface is shared, ie. must not be drawn on
+def render_workspace_name(name):
+    key = names_style + (name,)
+    with render_lock:
+        if key not in label_cache:
+            names_font, names_fontsize, names_color = names_style
+            label_cache[key] = get_font(names_font, names_fontsize).render(name, True, pygame.Color(names_color))
+        return label_cache[key]
 
-def draw_grid(screen, grid):
+
+# renders ws name label ahead of time, so drawing the tile is just a blit
+def prepare_label(ws_num, name=None):
+    if pygame is None or not config.getboolean('CONF', 'names_show'):
+        return
+    try:
+        render_workspace_name(get_workspace_name(ws_num, name))
+    except Exception as e:
+        logger.error('rendering name of WS [{}] failed: {}'.format(ws_num, e))
+
+
+def get_layout_spacing(screen_w, screen_h):
     padding_x = config.getint('CONF', 'padding_percent_x')
     padding_y = config.getint('CONF', 'padding_percent_y')
     spacing_x = config.getint('CONF', 'spacing_percent_x')
     spacing_y = config.getint('CONF', 'spacing_percent_y')
-    frame_width = config.getint('CONF', 'frame_width_px')
-    highlight_percentage = config.getint('CONF', 'highlight_percentage')
-
-    screen_w = screen.get_width()
-    screen_h = screen.get_height()
 
     pad_w = screen_w * padding_x / 100  # spacing between outermost tiles and screen
     pad_h = screen_h * padding_y / 100  # spacing between outermost tiles and screen
     spacing_x = screen_w * spacing_x / 100  # spacing between tiles
     spacing_y = screen_h * spacing_y / 100  # spacing between tiles
 
+    return pad_w, pad_h, spacing_x, spacing_y
+
 
-    screen.fill(config.getcolor('CONF', 'bgcolor'))
+# returns tile index -> tile mappings with their geometry resolved
+def layout_tiles(screen_w, screen_h, grid_layout, wss):
+    pad_w, pad_h, spacing_x, spacing_y = get_layout_spacing(screen_w, screen_h)
+    rows = len(grid_layout)
 
-    max_tile_w, max_tile_h = get_max_tile_dimensions(screen_w, screen_h, pad_w, pad_h, spacing_x, spacing_y, grid)
+    max_tile_w, max_tile_h = get_max_tile_dimensions(screen_w, screen_h, pad_w, pad_h, spacing_x, spacing_y, tuple(grid_layout))
 
-    for i, row in enumerate(grid):
-        # origin_y = round((screen_h - len(grid)*max_tile_h - (len(grid)-1)*spacing_y)/2) + round((max_tile_h + spacing_y) * i)
-        center_y = ((screen_h - len(grid)*max_tile_h - (len(grid)-1)*spacing_y)/2) + ((max_tile_h + spacing_y) * i) + max_tile_h/2
-        for j, t in enumerate(row):
+    tiles = {}  # contains grid tile index to thumbnail/ws_screenshot data mappings
+    wss = list(wss)
+    for i, elements_in_row in enumerate(grid_layout):
+        # origin_y = round((screen_h - rows*max_tile_h - (rows-1)*spacing_y)/2) + round((max_tile_h + spacing_y) * i)
+        center_y = ((screen_h - rows*max_tile_h - (rows-1)*spacing_y)/2) + ((max_tile_h + spacing_y) * i) + max_tile_h/2
+        for j in range(elements_in_row):
+            ws_num = wss.pop(0)
 
             tile_h = max_tile_h  # reset
             tile_w = max_tile_w  # reset
 
             # origin_x = round((screen_w - len(row)*max_tile_w - (len(row)-1)*spacing_x)/2) + round((max_tile_w + spacing_x) * j)
-            center_x = ((screen_w - len(row)*max_tile_w - (len(row)-1)*spacing_x)/2) + ((max_tile_w + spacing_x) * j) + max_tile_w/2
+            center_x = ((screen_w - elements_in_row*max_tile_w - (elements_in_row-1)*spacing_x)/2) + ((max_tile_w + spacing_x) * j) + max_tile_w/2
 
-            ws_conf = global_knowledge['wss'][t['ws']]
+            ws_conf = global_knowledge['wss'][ws_num]
 
             if (screen_w > screen_h):
                 # height remains @ max
@@ -592,49 +1199,24 @@ def draw_grid(screen, grid):
                 # width remains @ max
                 tile_h = tile_w / ws_conf['ratio']
 
-            tile_w_rounded = round(tile_w)
-            tile_h_rounded = round(tile_h)
             origin_y = center_y - tile_h/2
             origin_x = center_x - tile_w/2
 
-
-            t['ul'] = (origin_x, origin_y)
-            t['br'] = (origin_x + tile_w_rounded, origin_y + tile_h_rounded)
-
-            screen.fill(t['frame_col'],
-                    (
-                        origin_x,
-                        origin_y,
-                        tile_w,
-                        tile_h
-                    ))
-            if t['tile_col'] is not None:
-                screen.fill(t['tile_col'],
-                        (
-                            origin_x + frame_width,
-                            origin_y + frame_width,
-                            tile_w - 2*frame_width,
-                            tile_h - 2*frame_width
-                        ))
-
-            # draw ws thumbnail (note we need to adjust for frame/border width)
-            screen.blit(
-                    pygame.transform.smoothscale(t['img'], (tile_w_rounded - 2*frame_width, tile_h_rounded - 2*frame_width)),
-                    (origin_x + frame_width, origin_y + frame_width)
-            )
-
-            if config.getboolean('CONF', 'names_show'):
-                render_workspace_name(t, screen, origin_x, origin_y, tile_w, tile_h)
-
-            mouseoff = screen.subsurface((origin_x, origin_y, tile_w_rounded, tile_h_rounded)).copy()  # used to replace mouseon highlight
-            mouseon = mouseoff.copy()
-
-            lightmask = pygame.Surface((tile_w_rounded, tile_h_rounded), pygame.SRCALPHA, 32)
-            lightmask.convert_alpha()
-            lightmask.fill((255,255,255,255 * highlight_percentage / 100))
-            mouseon.blit(lightmask, (0, 0))
-            t['mouseon'] = mouseon
-            t['mouseoff'] = mouseoff
+            tiles[len(tiles)] = {
+                'active'    : False,
+                'missing'   : True,   # whether we have no screenshot for this ws
+                'mouseoff'  : None,
+                'mouseon'   : None,
+                'label'     : None,   # rendered ws name
+                'label_pos' : None,
+                'ul'        : (origin_x, origin_y),  # upper-left coords (including frame/border);
+                'br'        : (origin_x + round(tile_w), origin_y + round(tile_h)),  # bottom-right coords (including frame/border);
+                'w'         : tile_w,
+                'h'         : tile_h,
+                'row_idx'   : i,
+                'ws'        : ws_num  # workspace.num this tile represents;
+            }
+    return tiles
 
 
 def resolve_grid_layout(screen_w, screen_h, wss) -> list[int]:
@@ -661,6 +1243,8 @@ def input_event_loop(screen, tiles, active_tile, grid, wss):
     t1 = time.time()
     workspaces = len(wss)
 
+    pygame.display.update(draw_tile_overlays(screen, active_tile, tiles))
+
     while pygame.display.get_init():  # Returns True if the display module has been initialized
         if global_updates_running:
             if isinstance(global_updates_running, bool):  # note bools are subclass of int, but not the other way around
@@ -671,9 +1255,12 @@ def input_event_loop(screen, tiles, active_tile, grid, wss):
         kbdmove = None
         jump = False   # states whether we're navigating into a selected ws
 
-        for event in pygame.event.get():
+        # block until there's something to do; UI_WAKE events merely get us to re-check global_updates_running above:
+        for event in [pygame.event.wait(UI_WAKE_TIMEOUT_MS)] + pygame.event.get():
             if event.type == pygame.QUIT:
                 return 1  # not string nor None
+            elif event.type == pygame.VIDEOEXPOSE:
+                pygame.display.update()
             elif event.type == pygame.MOUSEMOTION:
                 is_mouse_input = True
             elif event.type == pygame.KEYDOWN:
@@ -739,11 +1326,10 @@ def input_event_loop(screen, tiles, active_tile, grid, wss):
             target_ws_num = tiles[active_tile]['ws']
             return 'workspace ' + str(global_knowledge['wss'][target_ws_num]['name'])
 
-        draw_tile_overlays(screen, active_tile, tiles)
+        dirty = draw_tile_overlays(screen, active_tile, tiles)
 
-        if pygame.display.get_init():  # check as UI might've been closed by on_ws() from other thread
-            pygame.display.update()
-            pygame.time.wait(50)
+        if dirty and pygame.display.get_init():  # only ever de-inited on shutdown, possibly from another thread
+            pygame.display.update(dirty)
     return 1  # not None, not str; unsure about this actually; think this statement is a corner case anyway
 
 
@@ -760,17 +1346,19 @@ def get_new_active_tile(tiles, active_tile, next_tiles):
     return i[min(list(i.keys()))]
 
 
-# draw/reset highlight overlays:
+# draw/reset highlight overlays; returns rects that were redrawn:
 def draw_tile_overlays(screen, active_tile, tiles):
+    dirty = []
     # first replace active thumbs with mouseoff/inactive ones, if tile is no longer active:
     for tile in tiles:
         if tile != active_tile and tiles[tile]['active']:
-            screen.blit(tiles[tile]['mouseoff'], tiles[tile]['ul'])
+            dirty.append(screen.blit(tiles[tile]['mouseoff'], tiles[tile]['ul']))
             tiles[tile]['active'] = False
     # ...and finally paint mouseon/active thumb for an active/selected tile:
     if active_tile is not None and not tiles[active_tile]['active']:
-        screen.blit(tiles[active_tile]['mouseon'], tiles[active_tile]['ul'])
+        dirty.append(screen.blit(tiles[active_tile]['mouseon'], tiles[active_tile]['ul']))
         tiles[active_tile]['active'] = True
+    return dirty
 
 
 def on_ws(i3, e):
@@ -783,11 +1371,14 @@ def on_ws(i3, e):
         gk['op'] = e.current.ipc_data['output']
     else:
         gk = None
+        if e.change == 'init':
+            prepare_label(e.current.num, e.current.name)
 
     if not global_updates_running:
         # this block gets executed if we exit expo by moving focus to other WS, ie. not by toggling WS change via expo itself
 
         global_updates_running = True  # make sure UI gets closed on workspace switch (including if we move cursor to neighboring WS when UI is rendered)
+        wake_ui()
 
         # if a floating window was focused on the WS we just moved away from (that had expo opened),
         # store it in global_knowledge so we can focus it once we return to that WS.
@@ -800,8 +1391,8 @@ def on_ws(i3, e):
         #
         # (note [e.old is not None] implies change='focus')
         if e.old is not None and e.old.num in global_knowledge['wss'] and len(e.old.focus) > 1:  # TODO schedule focus events when returning to ws??? sounds like hacky & loads of corner cases
-            win = i3.get_tree().find_by_id(e.old.focus[1])
-            if win.type == 'floating_con' and win.focus:
+            win = tree_model.tree().find_by_id(e.old.focus[1])
+            if win is not None and win.type == 'floating_con' and win.focus:
                 global_knowledge['wss'][e.old.num]['ff'] = win.focus[0]
     elif gk is not None and gk['ff'] is not None and e.change == 'focus':
         i3.command('[con_id={}] focus'.format(gk['ff']))
@@ -814,10 +1405,18 @@ def on_ws(i3, e):
 def on_ws_empty(i3, e):
     logger.debug(' ---- on ws EMPTY: {}'.format(e.change))
 
-    wspace_nums = [w.num for w in i3.get_tree().workspaces()]
+    wspace_nums = [w.num for w in tree_model.tree().workspaces()]
     deleted = [n for n in global_knowledge['wss'] if n not in wspace_nums]
     for n in deleted:
         del global_knowledge['wss'][n]
+        thumbs.discard(n)
+        refresh.forget(n)
+        ws_windows.pop(n, None)
+        with render_lock:
+            frame_cache['rendered'].pop(n, None)
+            pyramids.pop(n, None)
+    if deleted:
+        prerender_frame()
 
 
 def on_ws_rename(i3, e):
@@ -825,6 +1424,8 @@ def on_ws_rename(i3, e):
     gk = global_knowledge['wss']
     if e.current.num in gk:
         gk[e.current.num]['name'] = e.current.name
+        prepare_label(e.current.num)
+        prerender_frame()
 
 
 # note we use the PREVIOUSLY_FOCUSED_WIN hack just because window event doesn't
@@ -849,6 +1450,45 @@ def on_win_title(i3, e):
         updater_debounced(i3, e)
 
 
+# control socket commands; see ctl.py. Note these are run on its server thread.
+def ctl_refresh(ws=None):
+    tree_model.invalidate()
+    visible = {o.current_workspace for o in tree_model.outputs() if o.active}
+    wss = {w.num for w in tree_model.tree().workspaces()
+           if w.name in visible and (ws is None or ws in (w.name, str(w.num)))}
+    if not wss:
+        raise ValueError('no visible ws [{}]; only those can be grabbed'.format(ws) if ws else 'no visible wss')
+    ctl_updater(i3, force=True, all_active_ws=True, only=wss)
+    metrics.incr('ctl_refreshes')
+    return 'refreshing {}'.format(sorted(wss))
+
+
+def ctl_stats():
+    return json.dumps(metrics.snapshot(), sort_keys=True, default=str)
+
+
+def start_ctl_server(updater):
+    global ctl_server
+    global ctl_updater
+
+    path = config.get('CONF', 'ctl_socket')
+    if not path:
+        return
+    ctl_updater = updater
+    server = ControlServer(path, {
+        'toggle'  : lambda: request_ui('toggle'),
+        'show'    : lambda: request_ui('show'),
+        'hide'    : lambda: request_ui('hide'),
+        'refresh' : ctl_refresh,
+        'stats'   : ctl_stats
+    })
+    try:
+        server.start()
+        ctl_server = server
+    except OSError as e:
+        logger.error('starting control socket at [{}] failed: {}'.format(path, e))
+
+
 def run():
     global i3
     global config
@@ -856,10 +1496,15 @@ def run():
     global updater_debounced
     global ws_update_debounced
     global logger
+    global LOCK
+    global tree_model
+    global event_core
 
     logger = logging.getLogger(__name__)
+    LOCK = singleton.SingleInstance()
 
     i3 = i3ipc.Connection()
+    tree_model = TreeModel(i3, observe=metrics.observe)
 
     converters = {'color': get_color}
     config = configparser.ConfigParser(converters = converters)
@@ -867,42 +1512,125 @@ def run():
     hot_reload()  # reads config and inits other global vars
 
     init_knowledge()
+
+    if config.get('CONF', 'event_core') == 'asyncio':
+        from . import aio  # imported only when used, as it pulls in asyncio
+        event_core = aio.EventCore(i3)
+        scheduler = event_core.scheduler
+        # delay before grabbing is a loop timer, instead of update_state() sleeping on the worker:
+        updater = event_core.deferred(partial(update_state, settle=False), lambda: update_delay)
+        refresher = updater
+        ws_handler = event_core.deferred(on_ws)
+    else:
+        scheduler = debounce.scheduler
+        updater = update_state
+        refresher = deferred(partial(update_state, settle=False))  # not to block the control socket, nor race debounced updates
+        ws_handler = on_ws
+
     updater_debounced = Debounce(config.getfloat('CONF', 'debounce_period_sec'),
-                                 partial(update_state, debounced=True))
-    ws_update_debounced = Debounce(0.15, update_state)
+                                 partial(updater, debounced=True),
+                                 max_wait=config.getfloat('CONF', 'debounce_max_wait_sec'),
+                                 max_period=config.getfloat('CONF', 'debounce_max_period_sec'),
+                                 scheduler=scheduler)
+    ws_update_debounced = Debounce(0.15, updater, max_wait=0.5, scheduler=scheduler)
+    ws_focus_debounced = Debounce(0.1, ws_handler, max_wait=0.3, scheduler=scheduler)  # eg when moving a ws, then many ::focus events seem to be triggered
+
+    # stats kept elsewhere, sampled when metrics are dumped; debounce drops are events coalesced away:
+    for name, d in (('window', updater_debounced), ('ws', ws_update_debounced), ('ws_focus', ws_focus_debounced)):
+        metrics.gauge('debounce_dropped_' + name, lambda d=d: d.stats['calls'] - d.stats['invocations'])
+    metrics.gauge('captures', lambda: dict(capture_stats))
+    metrics.gauge('thumbnails', thumbs.get_stats)
+    metrics.gauge('capture_buffers', lambda: dict(buffers.stats))
+    metrics.gauge('tree_model', lambda: dict(tree_model.stats))
 
     signal.signal(signal.SIGINT, signal_quit)
     signal.signal(signal.SIGTERM, signal_quit)
     signal.signal(signal.SIGHUP, signal_reload)
     signal.signal(signal.SIGUSR1, signal_toggle_ui)
+    signal.signal(signal.SIGUSR2, signal_dump_stats)
+
+    r, w = os.pipe()
+    os.set_blocking(w, False)
+    signal.set_wakeup_fd(w, warn_on_full_buffer=False)
+    sig_watcher = Thread(target = signal_watcher, args = (r,))
+    sig_watcher.daemon = True
+    sig_watcher.start()
 
     update_state(i3, all_active_ws=True)
+    metrics.observe('first_capture', time.perf_counter() - T_IMPORT)
+    logger.info('first capture done {:.3f}s after import'.format(time.perf_counter()-T_IMPORT))
+
+    ui_warmer = Thread(target = warm_ui)
+    ui_warmer.daemon = True
+    ui_warmer.start()
+
+    start_ctl_server(refresher)
+
+    subscriptions = [
+        # tree model goes first, so other handlers see it updated:
+        ('window', tree_model.on_window),
+        ('workspace', tree_model.on_workspace),
+        ('output', tree_model.on_output),
+        # ('window::new', update_state),  # no need when changing on window::focus
+        # ('window::close', update_state),  # no need when changing on window::focus
+        ('window::move', updater_debounced),
+        ('window::floating', updater_debounced),
+        ('window::fullscreen_mode', updater_debounced),
+        ('window::focus', on_win_focus),
+        ('window::title', on_win_title),
+        ('workspace::focus', ws_focus_debounced),
+        ('workspace::init', on_ws),
+        ('workspace::move', on_ws),
+        ('workspace::restored', on_ws),
+        ('workspace::empty', on_ws_empty),
+        ('workspace::rename', on_ws_rename),
+        ('shutdown', on_shutdown)
+    ]
+
+    if event_core is not None:
+        for event, handler in subscriptions:
+            event_core.on(event, handler, on_loop=isinstance(handler, Debounce))
+        event_core.call_every(lambda: loop_interval, periodic_update)
+        event_core.start()
+    else:
+        for event, handler in subscriptions:
+            i3.on(event, handler)
+
+        i3_thread = Thread(target = i3.main)
+        i3_thread.daemon = True
+        i3_thread.start()
 
-    # i3.on('window::new', update_state)  # no need when changing on window::focus
-    # i3.on('window::close', update_state)  # no need when changing on window::focus
-    i3.on('window::move', updater_debounced)
-    i3.on('window::floating', updater_debounced)
-    i3.on('window::fullscreen_mode', updater_debounced)
-    i3.on('window::focus', on_win_focus)
-    i3.on('window::title', on_win_title)
-    i3.on('workspace::focus', Debounce(0.1, on_ws))  # eg when moving a ws, then many ::focus events seem to be triggered
-    i3.on('workspace::init', on_ws)
-    i3.on('workspace::move', on_ws)
-    i3.on('workspace::restored', on_ws)
-    i3.on('workspace::empty', on_ws_empty)
-    i3.on('workspace::rename', on_ws_rename)
-    i3.on('shutdown', on_shutdown)
-
-    i3_thread = Thread(target = i3.main)
-    i3_thread.daemon = True
-    i3_thread.start()
-
-    # TODO: consider higher interval for non-focused WS; just to shed some load
+        updater_thread = Thread(target = periodic_update_loop)
+        updater_thread.daemon = True
+        updater_thread.start()
+
+    ui_dispatcher()  # main thread is left for the UI
+
+
+# note updates are run on the debounce scheduler, ie. one at a time w/ debounced
+# & control socket ones
+def periodic_update_loop():
     while True:
         time.sleep(loop_interval)
-        # os.nice(10)
-        update_state(i3, rate_limit_period=loop_interval, all_active_ws=True, force=True)
-        # os.nice(-10)
+        deferred(periodic_update)()
+
+
+# returns function that runs f(*args, **kwargs) on the debounce scheduler's
+# thread & returns right away; threads event_core's counterpart of EventCore.deferred()
+def deferred(f):
+    def submit(*args, **kwargs):
+        debounce.scheduler.call_at(time.monotonic(), partial(f, *args, **kwargs))
+    return submit
+
+
+# each ws is only refreshed once due as per its own interval; see RefreshScheduler
+def periodic_update():
+    tree_model.invalidate()  # resizes emit no events, so reconcile w/ i3 here
+    # os.nice(10)
+    # no event to let windows settle after, ie. no point in holding up the scheduler w/ settle:
+    update_state(i3, rate_limit_period=loop_interval, all_active_ws=True, force=True, damaged_only=True, scheduled=True,
+                 settle=False)
+    # os.nice(-10)
 
 
 if __name__ == '__main__':  # pragma: no cover
@@ -0,0 +1,102 @@
+import os
+import json
+import tempfile
+from time import perf_counter
+from threading import RLock
+from contextlib import contextmanager
+
+# histogram bucket upper bounds in ms; anything slower lands in the last, open-ended one
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def default_stats_path():
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or '/tmp', 'i3expo-{}.stats'.format(os.getuid()))
+
+
+# latency histograms & counters, cheap enough to be always on: each observation
+# is a bucket increment, ie. memory use doesn't grow with the no of samples.
+# Gauges are functions sampled only when a snapshot is taken, for stats already
+# kept elsewhere (eg. Debounce.stats).
+class Metrics(object):
+
+    def __init__(self):
+        self.lock = RLock()  # reentrant, as snapshots are taken from signal handlers
+        self.histograms = {}  # name -> {'buckets': [counts], 'count', 'sum', 'max'}
+        self.counters = {}
+        self.gauges = {}  # name -> function returning current value
+
+    def observe(self, name, seconds):
+        ms = seconds * 1000
+        with self.lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = {'buckets': [0] * (len(BUCKETS_MS) + 1), 'count': 0, 'sum': 0.0, 'max': 0.0}
+            idx = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+            h['buckets'][idx] += 1
+            h['count'] += 1
+            h['sum'] += ms
+            h['max'] = max(h['max'], ms)
+
+    @contextmanager
+    def timer(self, name):
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - t0)
+
+    def incr(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, f):
+        self.gauges[name] = f
+
+    # upper bound of the bucket given quantile falls in, capped at max seen
+    @staticmethod
+    def quantile(h, q):
+        rank = q * h['count']
+        seen = 0
+        for idx, n in enumerate(h['buckets']):
+            seen += n
+            if n and seen >= rank:
+                return min(h['max'], BUCKETS_MS[idx]) if idx < len(BUCKETS_MS) else h['max']
+        return h['max']
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            timings = {name: {
+                'count'   : h['count'],
+                'mean_ms' : h['sum'] / h['count'],
+                'p50_ms'  : self.quantile(h, 0.5),
+                'p90_ms'  : self.quantile(h, 0.9),
+                'p99_ms'  : self.quantile(h, 0.99),
+                'max_ms'  : h['max']
+            } for name, h in self.histograms.items() if h['count']}
+            counters = dict(self.counters)
+
+        gauges = {}
+        for name, f in self.gauges.items():
+            try:
+                gauges[name] = f()
+            except Exception as e:
+                gauges[name] = 'n/a: {}'.format(e)
+        return {'timings': timings, 'counters': counters, 'gauges': gauges}
+
+    # written into a private temp file that's atomically moved in place, so
+    # nothing's ever written through whatever's at a guessable path in eg. /tmp
+    def dump(self, path):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.i3expo-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2, sort_keys=True, default=str)
+                f.write('\n')
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
@@ -0,0 +1,31 @@
+# mip pyramid of an image: level 0 is the image itself, each further level is
+# half the size of the previous one. A tile of any size is scaled from the
+# smallest level still no smaller than itself, instead of always from level 0.
+#
+# levels are only built once asked for, each from the one above it; so no extra
+# memory is used while tiles are about the size of the image, as is the case
+# w/ thumbnail_size = auto. Note level 0 is passed in on each call instead of
+# kept, as it's usually a view of a capture buffer we don't own.
+class Pyramid(object):
+
+    def __init__(self, size, downscale, min_size=16):
+        self.size = size  # (w, h) of level 0
+        self.downscale = downscale  # f(image, (w, h)) -> image
+        self.min_size = min_size
+        self.levels = []  # levels 1.. built so far
+
+    # level to scale given base image from for a w x h target; if not build,
+    # the nearest one already built is returned instead
+    def get(self, base, w, h, build=True):
+        lw, lh = self.size
+        img = base
+        idx = 0
+        while lw // 2 >= max(w, self.min_size) and lh // 2 >= max(h, self.min_size):
+            lw, lh = lw // 2, lh // 2
+            if idx == len(self.levels):
+                if not build:
+                    break
+                self.levels.append(self.downscale(img, (lw, lh)))
+            img = self.levels[idx]
+            idx += 1
+        return img
@@ -0,0 +1,51 @@
+import os
+
+
+# per-ws periodic refresh intervals: a ws whose screenshot keeps changing is
+# refreshed every min_interval, whereas one that doesn't change backs off
+# exponentially up to max_interval.
+class RefreshScheduler(object):
+
+    def __init__(self, min_interval, max_interval, backoff=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.intervals = {}  # ws num -> current refresh interval
+        self.next_due = {}  # ws num -> when it should next be refreshed
+
+    # whether given ws should be refreshed at time t; unknown ones always are
+    def due(self, key, t):
+        return t >= self.next_due.get(key, 0)
+
+    # record outcome of refreshing given ws at time t
+    def record(self, key, changed, t):
+        interval = self.intervals.get(key, self.min_interval)
+        if changed:
+            interval /= self.backoff
+        else:
+            interval *= self.backoff
+        interval = min(self.max_interval, max(self.min_interval, interval))
+
+        self.intervals[key] = interval
+        self.next_due[key] = t + interval
+
+    def forget(self, key):
+        self.intervals.pop(key, None)
+        self.next_due.pop(key, None)
+
+
+# whether any of given screen locker processes is running as us
+def screen_locked(lockers):
+    uid = os.getuid()
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            if os.stat('/proc/' + pid).st_uid != uid:
+                continue
+            with open('/proc/' + pid + '/comm') as f:
+                if f.read().strip() in lockers:
+                    return True
+        except OSError:  # process is gone already
+            pass
+    return False
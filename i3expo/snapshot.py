@@ -0,0 +1,109 @@
+# binary state snapshot; layout:
+#
+#   header: MAGIC, format version (u16), reserved (u16), index length (u32)
+#   index:  utf-8 json {'meta': {...}, 'sections': {key: [w, h, offset, length, compressed]}}
+#   data:   raw (or zlib-compressed) BGRA thumbnails; offsets are relative to data start
+#
+# sections are loaded as memoryviews over a read-only mmap, ie. pages are only
+# read in once the thumbnail is actually used. Contents are never trusted - all
+# index values are bounds-checked, and nothing is ever unpickled/evaluated.
+
+import os
+import json
+import mmap
+import struct
+import tempfile
+
+MAGIC = b'I3XS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+# sections: key -> [w, h, data, compressed]; keys are stringified in the index
+def write(path, meta, sections):
+    index = {'meta': meta, 'sections': {}}
+    chunks = []
+    offset = 0
+    for key, (w, h, data, compressed) in sections.items():
+        length = memoryview(data).nbytes
+        index['sections'][str(key)] = [w, h, offset, length, compressed]
+        chunks.append(data)
+        offset += length
+
+    index = json.dumps(index).encode('utf-8')
+    header = HEADER.pack(MAGIC, VERSION, 0, len(index))
+
+    # write into a private temp file & atomically move it in place, so a
+    # half-written file is never read back:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.i3expo-')
+    try:
+        with os.fdopen(fd, 'wb', buffering=0) as f:
+            _writev_all(f.fileno(), [header, index] + chunks)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# gather-write all chunks, ie. the whole snapshot normally goes out in a single syscall
+def _writev_all(fd, chunks):
+    chunks = [memoryview(c).cast('B') for c in chunks]
+    iov_max = os.sysconf('SC_IOV_MAX')
+    while chunks:
+        n = os.writev(fd, chunks[:iov_max])
+        while n:
+            if n >= len(chunks[0]):
+                n -= len(chunks.pop(0))
+            else:
+                chunks[0] = chunks[0][n:]
+                n = 0
+        while chunks and not len(chunks[0]):
+            chunks.pop(0)
+
+
+# returns (meta, sections) where sections' data are memoryviews into the mmapped file
+def read(path):
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_uid != os.getuid() or st.st_mode & 0o022:
+            raise SnapshotError('refusing to load [{}] not exclusively writable by us'.format(path))
+        if st.st_size < HEADER.size:
+            raise SnapshotError('truncated snapshot')
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buf = memoryview(mm)
+    magic, version, _, index_len = HEADER.unpack_from(buf)
+    if magic != MAGIC or version != VERSION:
+        raise SnapshotError('unknown snapshot format')
+
+    data_start = HEADER.size + index_len
+    if data_start > len(buf):
+        raise SnapshotError('truncated snapshot index')
+
+    try:
+        index = json.loads(bytes(buf[HEADER.size:data_start]).decode('utf-8'))
+        meta = index['meta']
+        raw_sections = index['sections']
+    except (ValueError, KeyError, TypeError) as e:
+        raise SnapshotError('corrupt snapshot index: {}'.format(e))
+    if not isinstance(meta, dict) or not isinstance(raw_sections, dict):
+        raise SnapshotError('corrupt snapshot index')
+
+    data_len = len(buf) - data_start
+    sections = {}
+    for key, s in raw_sections.items():
+        if not (isinstance(s, list) and len(s) == 5
+                and all(type(i) is int for i in s[:4])
+                and type(s[4]) is bool):
+            raise SnapshotError('corrupt section [{}]'.format(key))
+        w, h, offset, length, compressed = s
+        if (w <= 0 or h <= 0 or offset < 0 or length < 0 or offset + length > data_len
+                or (not compressed and length != w * h * 4)):
+            raise SnapshotError('section [{}] out of bounds'.format(key))
+        sections[key] = [w, h, buf[data_start + offset:data_start + offset + length], compressed]
+
+    return meta, sections
@@ -0,0 +1,34 @@
+# picks the cheaper of several ways to do something, per key (eg. output
+# layout), by measuring them: each strategy is tried a few times first, after
+# which the fastest one is used, with the others re-probed every now and then
+# in case circumstances have changed.
+class StrategyPicker(object):
+
+    def __init__(self, strategies, probes=3, reprobe_every=100):
+        self.strategies = list(strategies)
+        self.probes = probes  # times each strategy is tried before settling
+        self.reprobe_every = reprobe_every  # every this many picks a non-best strategy is measured again
+        self.samples = {}  # key -> {strategy: [moving avg cost, times measured]}
+        self.picks = {}  # key -> no of picks
+
+    def pick(self, key):
+        samples = self.samples.setdefault(key, {s: [0.0, 0] for s in self.strategies})
+        self.picks[key] = n = self.picks.get(key, 0) + 1
+
+        untried = [s for s in self.strategies if samples[s][1] < self.probes]
+        if untried:
+            return min(untried, key=lambda s: samples[s][1])
+
+        ranked = sorted(self.strategies, key=lambda s: samples[s][0])
+        if n % self.reprobe_every == 0 and len(ranked) > 1:
+            return ranked[1 + (n // self.reprobe_every) % (len(ranked) - 1)]
+        return ranked[0]
+
+    def record(self, key, strategy, cost):
+        sample = self.samples[key][strategy]
+        sample[0] = cost if not sample[1] else 0.7 * sample[0] + 0.3 * cost
+        sample[1] += 1
+
+    # key -> strategy currently considered the cheapest
+    def best(self):
+        return {k: min(s, key=lambda x: s[x][0]) for k, s in self.samples.items()}
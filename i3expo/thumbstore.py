@@ -0,0 +1,163 @@
+import time
+import zlib
+from collections import OrderedDict
+from threading import RLock
+
+
+class ThumbnailStore(object):
+
+    def __init__(self, mem_limit=0, hot_count=4, release=None):
+        self.mem_limit = mem_limit  # max bytes all stored thumbnails may take up; 0 for no limit
+        self.hot_count = hot_count  # this many most recently used thumbnails are kept uncompressed
+        self.release = release  # if set, called w/ (w, h, data) of raw data we no longer hold, eg. for recycling it
+        self.entries = OrderedDict()  # key -> [w, h, data, compressed]; least recently used first
+        self.mem = 0
+        self.versions = {}  # key -> generation it was last stored at; lets consumers detect changes
+        self.borrowed = {}  # id(data) -> [data, no of readers, release pending] of data handed out by borrow()
+        self.generation = 0
+        self.lock = RLock()
+        self.stats = {
+            'hits'            : 0,
+            'misses'          : 0,
+            'compressions'    : 0,
+            'decompressions'  : 0,
+            'decompress_time' : 0.0,  # total seconds spent decompressing
+            'evictions'       : 0
+        }
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    # changes whenever data stored under key changes; None if we don't have it
+    def version(self, key):
+        return self.versions.get(key)
+
+    # (w, h) of thumbnail stored under key, or None
+    def size(self, key):
+        with self.lock:
+            e = self.entries.get(key)
+            return None if e is None else (e[0], e[1])
+
+    # whether thumbnail under key is stored compressed, ie. takes decompressing to use
+    def is_cold(self, key):
+        with self.lock:
+            e = self.entries.get(key)
+            return e is not None and e[3]
+
+    def keys(self):
+        with self.lock:
+            return list(self.entries.keys())
+
+    # store [w, h, data] screenshot under given key; it becomes the most recently used one
+    def put(self, key, shot):
+        with self.lock:
+            self._remove(key)
+            self._add(key, [shot[0], shot[1], shot[2], False])
+            self._enforce_limits()
+
+    # returns [w, h, data] or None if we don't have it
+    def get(self, key):
+        with self.lock:
+            e = self.entries.get(key)
+            if e is None:
+                self.stats['misses'] += 1
+                return None
+
+            self.stats['hits'] += 1
+            self.entries.move_to_end(key)
+            if e[3]:
+                t0 = time.time()
+                data = zlib.decompress(e[2])
+                self.stats['decompress_time'] += time.time() - t0
+                self.stats['decompressions'] += 1
+
+                # note we don't re-compress anything here, to keep the UI path quick;
+                # that's left for the next put()
+                self.mem += len(data) - len(e[2])
+                e[2] = data
+                e[3] = False
+            return e[:3]
+
+    # as get(), but data is not handed to release until the shot is passed to
+    # give_back(), even if it's replaced, compressed or evicted meanwhile; for
+    # readers outside our lock, eg. ones drawing from the data zero-copy
+    def borrow(self, key):
+        with self.lock:
+            shot = self.get(key)
+            if shot is not None:
+                b = self.borrowed.setdefault(id(shot[2]), [shot[2], 0, False])
+                b[1] += 1
+            return shot
+
+    def give_back(self, shot):
+        with self.lock:
+            b = self.borrowed[id(shot[2])]
+            b[1] -= 1
+            if not b[1]:
+                del self.borrowed[id(shot[2])]
+                if b[2] and self.release is not None:
+                    self.release(shot[0], shot[1], shot[2])
+
+    def discard(self, key):
+        with self.lock:
+            self._remove(key)
+
+    # entries as they're stored, ie. possibly compressed; for persisting state
+    def export(self):
+        with self.lock:
+            return {k: list(e) for k, e in self.entries.items()}
+
+    def restore(self, entries):
+        with self.lock:
+            for k, e in entries.items():
+                self._remove(k)
+                self._add(k, list(e))
+            self._enforce_limits()
+
+    def get_stats(self):
+        with self.lock:
+            s = dict(self.stats)
+            s['entries'] = len(self.entries)
+            s['compressed'] = sum(1 for e in self.entries.values() if e[3])
+            s['borrowed'] = len(self.borrowed)
+            s['mem'] = self.mem
+            return s
+
+    def _add(self, key, e):
+        self.entries[key] = e
+        self.mem += len(e[2])
+        self.generation += 1
+        self.versions[key] = self.generation
+
+    def _remove(self, key):
+        e = self.entries.pop(key, None)
+        if e is not None:
+            self.mem -= len(e[2])
+            del self.versions[key]
+            if not e[3]:
+                self._release(e)
+
+    def _release(self, e):
+        b = self.borrowed.get(id(e[2]))
+        if b is not None:  # left for give_back()
+            b[2] = True
+        elif self.release is not None:
+            self.release(e[0], e[1], e[2])
+
+    def _enforce_limits(self):
+        # compress everything but the hot ones:
+        for key in list(self.entries.keys())[:-self.hot_count or None]:
+            e = self.entries[key]
+            if not e[3]:
+                data = zlib.compress(e[2], 1)
+                self.mem += len(data) - len(e[2])
+                self._release(e)
+                e[2] = data
+                e[3] = True
+                self.stats['compressions'] += 1
+
+        # ...and evict least recently used ones if we're still over the limit;
+        # the most recent one is always kept:
+        while self.mem_limit and self.mem > self.mem_limit and len(self.entries) > 1:
+            self._remove(next(iter(self.entries)))
+            self.stats['evictions'] += 1
@@ -0,0 +1,94 @@
+from time import monotonic
+from threading import RLock
+
+
+# local copy of i3's layout tree & outputs, so hot paths don't have to ask i3
+# for a full tree dump every time. Kept up to date from the event stream:
+# focus & title changes are applied in place, anything structural just drops
+# the copy, so it's re-fetched on next access. It's also re-fetched once older
+# than max_age, as some changes (eg. resizes) emit no events at all.
+# observe(name, seconds) is called w/ the duration of each query sent to i3.
+class TreeModel(object):
+
+    def __init__(self, i3, max_age=30.0, observe=None):
+        self.i3 = i3
+        self.max_age = max_age
+        self.observe = observe
+        self.lock = RLock()
+        self._tree = None
+        self._outputs = None
+        self.fetched = 0.0  # when _tree was fetched
+        self.stats = {
+            'fetches' : 0,
+            'hits'    : 0
+        }
+
+    def tree(self):
+        with self.lock:
+            if self._tree is None or monotonic() - self.fetched > self.max_age:
+                t0 = monotonic()
+                self._tree = self.i3.get_tree()
+                self.fetched = monotonic()
+                if self.observe is not None:
+                    self.observe('ipc_get_tree', self.fetched - t0)
+                self.stats['fetches'] += 1
+            else:
+                self.stats['hits'] += 1
+            return self._tree
+
+    def outputs(self):
+        with self.lock:
+            if self._outputs is None:
+                t0 = monotonic()
+                self._outputs = self.i3.get_outputs()
+                if self.observe is not None:
+                    self.observe('ipc_get_outputs', monotonic() - t0)
+            return self._outputs
+
+    def invalidate(self):
+        with self.lock:
+            self._tree = None
+            self._outputs = None
+
+    # should be subscribed to 'window' events prior to any other handlers
+    def on_window(self, i3, e):
+        with self.lock:
+            if self._tree is None:
+                return
+            elif e.change == 'focus':
+                self._focus(e.container.id)
+            elif e.change == 'title':
+                c = self._tree.find_by_id(e.container.id)
+                if c is None:
+                    self._tree = None
+                else:
+                    c.name = e.container.name
+                    c.window_title = e.container.window_title
+            elif e.change not in ('urgent', 'mark'):  # eg. new, close, move, floating, fullscreen_mode
+                self._tree = None
+
+    # should be subscribed to 'workspace' events prior to any other handlers
+    def on_workspace(self, i3, e):
+        with self.lock:
+            if e.change == 'focus':
+                if self._tree is not None:
+                    focused = e.current.find_focused() or e.current  # empty ws is focused itself
+                    self._focus(focused.id)
+                for o in self._outputs or []:
+                    if o.name == e.current.ipc_data['output']:
+                        o.current_workspace = e.current.name
+            elif e.change != 'urgent':  # eg. init, empty, move, rename, restored, reload
+                self.invalidate()
+
+    def on_output(self, i3, e):
+        self.invalidate()
+
+    def _focus(self, con_id):
+        c = self._tree.find_by_id(con_id)
+        if c is None:
+            self._tree = None
+            return
+        prev = self._tree.find_focused()
+        if prev is not None:
+            prev.focused = False
+        c.focused = True
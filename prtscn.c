@@ -1,35 +1,645 @@
 #include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
+#include <pthread.h>
+#include <sys/ipc.h>
+#include <sys/shm.h>
 #include <X11/X.h>
 #include <X11/Xutil.h>
-//Compile hint: gcc -shared -O3 -fPIC -Wl,-soname,prtscn -o prtscn.so prtscn.c -lX11
+#include <X11/extensions/XShm.h>
+#include <X11/extensions/Xdamage.h>
+#include <X11/extensions/Xfixes.h>
+#include <X11/extensions/scrnsaver.h>
+#include <X11/extensions/Xcomposite.h>
+//Compile hint: gcc -shared -O3 -fPIC -Wl,-soname,prtscn -o prtscn.so prtscn.c -lX11 -lXext -lXdamage -lXfixes -lXss -lXcomposite -lpthread
 
-void getScreen(const int, const int, const int, const int, unsigned char *);
-void getScreen(const int xx, const int yy, const int W, const int H, /*out*/ unsigned char * data)
+// single display connection kept open for the lifetime of the process; all
+// access to it is serialized via lock, as we're called from multiple threads.
+static pthread_mutex_t lock = PTHREAD_MUTEX_INITIALIZER;
+static Display *display = NULL;
+static Window root;
+static int use_shm = 0;  // whether XShm is usable for this display
+static int x_error = 0;  // set by _error_handler()
+static int redirected = 0;  // whether compositeRedirect() is in effect
+
+// change tracking via the Damage extension; damage reported for the root window
+// is accumulated into the damaged region until queried for:
+static int track_damage = 0;  // whether damageTrack() has been requested
+static Damage damage = None;
+static XserverRegion damaged = None;
+
+// shared memory images are keyed by their dimensions, so multi-monitor setups
+// with differently sized outputs don't keep re-creating segments:
+#define SHM_SLOTS 4
+typedef struct {
+   XImage *image;
+   XShmSegmentInfo info;
+} shm_slot;
+static shm_slot slots[SHM_SLOTS];
+static int next_slot = 0;  // round-robin eviction index
+
+
+static int _error_handler(Display *d, XErrorEvent *e)
+{
+   x_error = e->error_code;
+   return 0;
+}
+
+
+static void _free_damage(void)
+{
+   if (damage != None) XDamageDestroy(display, damage);
+   if (damaged != None) XFixesDestroyRegion(display, damaged);
+   damage = None;
+   damaged = None;
+}
+
+
+static void _init_damage(void)
+{
+   int event_base, error_base;
+   if (!XDamageQueryExtension(display, &event_base, &error_base)
+         || !XFixesQueryExtension(display, &event_base, &error_base))
+      return;
+
+   XErrorHandler old_handler = XSetErrorHandler(_error_handler);
+   x_error = 0;
+   // NonEmpty level only reports once until damage is subtracted, ie. it's the least chatty one:
+   damage = XDamageCreate(display, root, XDamageReportNonEmpty);
+   damaged = XFixesCreateRegion(display, NULL, 0);
+   XSync(display, False);
+   if (x_error) _free_damage();
+   XSetErrorHandler(old_handler);
+}
+
+
+static int _open_display(void)
+{
+   if (display != NULL) return 1;
+
+   display = XOpenDisplay(NULL);
+   if (display == NULL) return 0;
+
+   root = DefaultRootWindow(display);
+   use_shm = XShmQueryExtension(display);
+   if (track_damage) _init_damage();
+   return 1;
+}
+
+
+static void _free_slot(shm_slot *slot)
 {
-   Display *display = XOpenDisplay(NULL);
-   Window root = DefaultRootWindow(display);
+   if (slot->image == NULL) return;
 
+   XShmDetach(display, &slot->info);
+   XDestroyImage(slot->image);  // note for shm images this doesn't free() the data
+   shmdt(slot->info.shmaddr);
+   slot->image = NULL;
+}
+
+
+// returns shared memory image for WxH grabs, or NULL if it can't be set up; note
+// only the server failing to attach our segment disables XShm altogether, as
+// the rest (eg. running into shm limits) may well work out for the next one.
+static XImage *_shm_image(const int W, const int H)
+{
+   for (int i = 0; i < SHM_SLOTS; i++) {
+      if (slots[i].image != NULL && slots[i].image->width == W && slots[i].image->height == H)
+         return slots[i].image;
+   }
+
+   shm_slot *slot = &slots[next_slot];
+   next_slot = (next_slot + 1) % SHM_SLOTS;
+   _free_slot(slot);
+
+   int screen = DefaultScreen(display);
+   XImage *image = XShmCreateImage(display, DefaultVisual(display, screen), DefaultDepth(display, screen),
+                                   ZPixmap, NULL, &slot->info, W, H);
+   if (image == NULL) return NULL;
+
+   slot->info.shmid = shmget(IPC_PRIVATE, image->bytes_per_line * image->height, IPC_CREAT | 0600);
+   if (slot->info.shmid == -1) {
+      XDestroyImage(image);
+      return NULL;
+   }
+   slot->info.shmaddr = shmat(slot->info.shmid, NULL, 0);
+   if (slot->info.shmaddr == (void *) -1) {
+      shmctl(slot->info.shmid, IPC_RMID, NULL);
+      XDestroyImage(image);
+      return NULL;
+   }
+   image->data = slot->info.shmaddr;
+   slot->info.readOnly = False;
+
+   // attaching fails eg for remote displays, where the server can't see our segment:
+   x_error = 0;
+   XShmAttach(display, &slot->info);
+   XSync(display, False);
+   shmctl(slot->info.shmid, IPC_RMID, NULL);  // segment is destroyed once both sides have detached
+
+   if (x_error) {
+      XDestroyImage(image);
+      shmdt(slot->info.shmaddr);
+      use_shm = 0;  // won't work any better next time; fall back to XGetImage for good
+      return NULL;
+   }
+
+   slot->image = image;
+   return image;
+}
+
+
+// grab given region of the root window; returned image is either a reusable
+// shared memory one (*shm set), or a fresh one the caller has to XDestroyImage().
+static XImage *_capture(const int xx, const int yy, const int W, const int H, int *shm)
+{
+   *shm = 0;
+   if (use_shm) {
+      XImage *image = _shm_image(W, H);
+      if (image != NULL) {
+         x_error = 0;
+         if (XShmGetImage(display, root, image, xx, yy, AllPlanes) && !x_error) {
+            *shm = 1;
+            return image;
+         }
+      }
+   }
+
+   x_error = 0;
    XImage *image = XGetImage(display, root, xx, yy, W, H, AllPlanes, ZPixmap);
+   if (image != NULL && x_error) {
+      XDestroyImage(image);
+      return NULL;
+   }
+   return image;
+}
+
+
+static void _release_capture(XImage *image, const int shm)
+{
+   if (!shm) XDestroyImage(image);
+}
+
+
+static int _mask_shift(unsigned long mask)
+{
+   int shift = 0;
+   while (mask && !(mask & 1)) {
+      mask >>= 1;
+      shift++;
+   }
+   return shift;
+}
+
 
+// generic conversion for whatever visual the server gives us; slow, as it
+// calls XGetPixel() for each and every pixel.
+static void _convert_generic(XImage *image, const int xx, const int yy, const int W, const int H, /*out*/ unsigned char * data)
+{
    unsigned long red_mask   = image->red_mask;
    unsigned long green_mask = image->green_mask;
    unsigned long blue_mask  = image->blue_mask;
-   int x, y;
+   int red_shift   = _mask_shift(red_mask);
+   int green_shift = _mask_shift(green_mask);
+   int blue_shift  = _mask_shift(blue_mask);
    int ii = 0;
-   for (y = 0; y < H; y++) {
-       for (x = 0; x < W; x++) {
+   for (int y = yy; y < yy + H; y++) {
+      for (int x = xx; x < xx + W; x++) {
          unsigned long pixel = XGetPixel(image, x, y);
-         unsigned char blue  = (pixel & blue_mask);
-         unsigned char green = (pixel & green_mask) >> 8;
-         unsigned char red   = (pixel & red_mask) >> 16;
+         data[ii]     = (pixel & blue_mask) >> blue_shift;    // blue
+         data[ii + 1] = (pixel & green_mask) >> green_shift;  // green
+         data[ii + 2] = (pixel & red_mask) >> red_shift;      // red
+         data[ii + 3] = 0xff;                                 // alpha
+         ii += 4;
+      }
+   }
+}
+
+
+// set to non-zero to always use _convert_generic(); for benchmarking only.
+int prtscn_generic_conversion = 0;
+
+// whether image pixels are laid out as BGRX in memory, ie. can be used as is
+static int _native_layout(const XImage *image)
+{
+   return !prtscn_generic_conversion
+         && image->bits_per_pixel == 32
+         && image->byte_order == LSBFirst
+         && image->red_mask == 0xff0000
+         && image->green_mask == 0xff00
+         && image->blue_mask == 0xff;
+}
+
+
+// convert WxH region of image starting at (xx, yy) into packed BGRA (ie the
+// native 32bpp ZPixmap layout with opaque alpha), one row at a time:
+static void _convert(XImage *image, const int xx, const int yy, const int W, const int H, /*out*/ unsigned char * data)
+{
+   if (!_native_layout(image)) {
+      _convert_generic(image, xx, yy, W, H, data);
+      return;
+   }
+
+   // BGRX -> BGRA; the padding byte is undefined, so force it opaque:
+   uint32_t alpha;
+   memcpy(&alpha, "\x00\x00\x00\xff", 4);
+   for (int y = 0; y < H; y++) {
+      const uint32_t *src = (const uint32_t *) (image->data + (yy + y) * image->bytes_per_line) + xx;
+      uint32_t *dst = (uint32_t *) data + y * W;
+      for (int x = 0; x < W; x++) dst[x] = src[x] | alpha;
+   }
+}
+
+
+// box-filter WxH BGR(A|X) pixels at src (rows stride bytes apart) down to
+// TWxTH BGRA at dst. src columns are first summed row-wise into acc, so memory
+// is only ever walked sequentially.
+static void _scale(const unsigned char *src, const int stride, const int W, const int H,
+                   /*out*/ unsigned char *dst, const int TW, const int TH)
+{
+   uint32_t *acc = calloc(W * 3, sizeof(uint32_t));
+   int *x_bounds = malloc((TW + 1) * sizeof(int));
+   for (int tx = 0; tx <= TW; tx++) x_bounds[tx] = (long) tx * W / TW;
+
+   for (int ty = 0; ty < TH; ty++) {
+      int sy0 = (long) ty * H / TH;
+      int sy1 = (long) (ty + 1) * H / TH;
+      if (sy1 <= sy0) sy1 = sy0 + 1;
+
+      memset(acc, 0, W * 3 * sizeof(uint32_t));
+      for (int sy = sy0; sy < sy1; sy++) {
+         const unsigned char *row = src + sy * stride;
+         for (int sx = 0; sx < W; sx++) {
+            acc[sx*3]     += row[sx*4];
+            acc[sx*3 + 1] += row[sx*4 + 1];
+            acc[sx*3 + 2] += row[sx*4 + 2];
+         }
+      }
+
+      unsigned char *out = dst + ty * TW * 4;
+      for (int tx = 0; tx < TW; tx++) {
+         int sx0 = x_bounds[tx];
+         int sx1 = x_bounds[tx + 1];
+         if (sx1 <= sx0) sx1 = sx0 + 1;
+
+         uint32_t b = 0, g = 0, r = 0;
+         for (int sx = sx0; sx < sx1; sx++) {
+            b += acc[sx*3];
+            g += acc[sx*3 + 1];
+            r += acc[sx*3 + 2];
+         }
+         uint32_t n = (sx1 - sx0) * (sy1 - sy0);
+         out[tx*4]     = b / n;
+         out[tx*4 + 1] = g / n;
+         out[tx*4 + 2] = r / n;
+         out[tx*4 + 3] = 0xff;
+      }
+   }
+
+   free(x_bounds);
+   free(acc);
+}
+
+
+// WxH region of image starting at (xx, yy) into TWxTH BGRA, downscaling if needed:
+static void _convert_scaled(XImage *image, const int xx, const int yy, const int W, const int H,
+                            const int TW, const int TH, /*out*/ unsigned char * data)
+{
+   if (TW == W && TH == H) {
+      _convert(image, xx, yy, W, H, data);
+   } else if (_native_layout(image)) {
+      // can scale straight off the image data; padding byte is ignored by _scale()
+      _scale((unsigned char *) image->data + yy * image->bytes_per_line + xx * 4, image->bytes_per_line,
+             W, H, data, TW, TH);
+   } else {
+      unsigned char *full = malloc(W * H * 4);
+      _convert(image, xx, yy, W, H, full);
+      _scale(full, W * 4, W, H, data, TW, TH);
+      free(full);
+   }
+}
 
-         data[ii + 2] = blue;
-         data[ii + 1] = green;
-         data[ii] = red;
-         ii += 3;
+
+// grab WxH region at (xx, yy) and store it as TWxTH BGRA in data; returns 0 on success
+int getScreenScaled(const int, const int, const int, const int, const int, const int, unsigned char *);
+int getScreenScaled(const int xx, const int yy, const int W, const int H,
+                    const int TW, const int TH, /*out*/ unsigned char * data)
+{
+   int result = -1;
+   pthread_mutex_lock(&lock);
+
+   if (_open_display()) {
+      XErrorHandler old_handler = XSetErrorHandler(_error_handler);
+      int shm;
+      XImage *image = _capture(xx, yy, W, H, &shm);
+      if (image != NULL) {
+         _convert_scaled(image, 0, 0, W, H, TW, TH, data);
+         _release_capture(image, shm);
+         result = 0;
       }
+      XSetErrorHandler(old_handler);
+   }
+
+   pthread_mutex_unlock(&lock);
+   return result;
+}
+
+
+// start tracking damage of the root window; returns 0 on success, ie. if the
+// server supports the Damage & XFixes extensions
+int damageTrack(void);
+int damageTrack(void)
+{
+   int result = -1;
+   pthread_mutex_lock(&lock);
+
+   track_damage = 1;
+   if (_open_display()) {
+      if (damage == None) _init_damage();
+      if (damage != None) result = 0;
    }
+
+   pthread_mutex_unlock(&lock);
+   return result;
+}
+
+
+// returns 1 if WxH region at (xx, yy) has been damaged since it was last
+// cleared, 0 if not, and -1 if damage isn't being tracked. If clear is set,
+// damage of the region is reset, ie. call it right before capturing the region.
+int damageQuery(const int, const int, const int, const int, const int);
+int damageQuery(const int xx, const int yy, const int W, const int H, const int clear)
+{
+   int result = -1;
+   pthread_mutex_lock(&lock);
+
+   if (_open_display() && damage != None) {
+      // we don't need the notify events themselves, but they mustn't pile up:
+      XEvent ev;
+      while (XPending(display)) XNextEvent(display, &ev);
+
+      // move damage reported so far into our accumulated region:
+      XserverRegion parts = XFixesCreateRegion(display, NULL, 0);
+      XDamageSubtract(display, damage, None, parts);
+      XFixesUnionRegion(display, damaged, damaged, parts);
+
+      XRectangle rect = {xx, yy, W, H};
+      XFixesSetRegion(display, parts, &rect, 1);
+      XserverRegion hit = XFixesCreateRegion(display, NULL, 0);
+      XFixesIntersectRegion(display, hit, damaged, parts);
+
+      int n = 0;
+      XRectangle *rects = XFixesFetchRegion(display, hit, &n);
+      if (rects != NULL) XFree(rects);
+      result = n > 0;
+
+      if (clear) XFixesSubtractRegion(display, damaged, damaged, parts);
+      XFixesDestroyRegion(display, hit);
+      XFixesDestroyRegion(display, parts);
+   }
+
+   pthread_mutex_unlock(&lock);
+   return result;
+}
+
+
+// strategies for getScreensScaled():
+#define CAPTURE_PER_REGION 0  // grab each region separately
+#define CAPTURE_BOUNDING 1    // grab bounding box of all regions once & slice it up
+
+// grab n regions into data[i] as TWxTH BGRA each; rects holds n (x, y, W, H,
+// TW, TH) sextuples. Which strategy is cheaper depends on the layout, eg. the
+// bounding box of outputs of different sizes may include lots of dead space.
+// returns 0 on success
+int getScreensScaled(const int, const int *, unsigned char **, const int);
+int getScreensScaled(const int n, const int *rects, /*out*/ unsigned char **data, const int strategy)
+{
+   int result = -1;
+   pthread_mutex_lock(&lock);
+
+   if (n > 0 && _open_display()) {
+      XErrorHandler old_handler = XSetErrorHandler(_error_handler);
+      int shm;
+      XImage *image;
+
+      if (strategy == CAPTURE_BOUNDING) {
+         int x0 = rects[0], y0 = rects[1], x1 = rects[0] + rects[2], y1 = rects[1] + rects[3];
+         for (int i = 1; i < n; i++) {
+            const int *r = rects + i * 6;
+            if (r[0] < x0) x0 = r[0];
+            if (r[1] < y0) y0 = r[1];
+            if (r[0] + r[2] > x1) x1 = r[0] + r[2];
+            if (r[1] + r[3] > y1) y1 = r[1] + r[3];
+         }
+
+         image = _capture(x0, y0, x1 - x0, y1 - y0, &shm);
+         if (image != NULL) {
+            for (int i = 0; i < n; i++) {
+               const int *r = rects + i * 6;
+               _convert_scaled(image, r[0] - x0, r[1] - y0, r[2], r[3], r[4], r[5], data[i]);
+            }
+            _release_capture(image, shm);
+            result = 0;
+         }
+      } else {
+         result = 0;
+         for (int i = 0; i < n; i++) {
+            const int *r = rects + i * 6;
+            image = _capture(r[0], r[1], r[2], r[3], &shm);
+            if (image == NULL) {
+               result = -1;
+               break;
+            }
+            _convert_scaled(image, 0, 0, r[2], r[3], r[4], r[5], data[i]);
+            _release_capture(image, shm);
+         }
+      }
+
+      XSetErrorHandler(old_handler);
+   }
+
+   pthread_mutex_unlock(&lock);
+   return result;
+}
+
+
+// redirect top-level windows - ie. i3's frames - offscreen w/ the Composite
+// extension; they're still automatically composited onto the screen as before,
+// but their contents can now be read w/ composeWindows() regardless of what's
+// stacked on top of them. Returns 0 on success. Undone by compositeUnredirect()
+// or closeDisplay().
+int compositeRedirect(void);
+int compositeRedirect(void)
+{
+   int result = -1;
+   pthread_mutex_lock(&lock);
+
+   int event_base, error_base, major = 0, minor = 2;
+   if (redirected) {
+      result = 0;
+   } else if (_open_display() && XCompositeQueryExtension(display, &event_base, &error_base)
+         && XCompositeQueryVersion(display, &major, &minor) && (major > 0 || minor >= 2)) {  // NameWindowPixmap needs 0.2
+      XErrorHandler old_handler = XSetErrorHandler(_error_handler);
+      x_error = 0;
+      XCompositeRedirectSubwindows(display, root, CompositeRedirectAutomatic);
+      XSync(display, False);
+      if (!x_error) result = 0;
+      XSetErrorHandler(old_handler);
+      redirected = !x_error;
+   }
+
+   pthread_mutex_unlock(&lock);
+   return result;
+}
+
+
+static void _unredirect(void)
+{
+   if (!redirected) return;
+
+   XErrorHandler old_handler = XSetErrorHandler(_error_handler);
+   XCompositeUnredirectSubwindows(display, root, CompositeRedirectAutomatic);
+   XSync(display, False);
+   XSetErrorHandler(old_handler);
+   redirected = 0;
+}
+
+
+// undo compositeRedirect(), eg. when switching back to grabbing the root window
+void compositeUnredirect(void);
+void compositeUnredirect(void)
+{
+   pthread_mutex_lock(&lock);
+   if (display != NULL) _unredirect();
+   pthread_mutex_unlock(&lock);
+}
+
+
+// top-level ancestor of given window, ie. the frame i3 reparented it into
+static Window _frame_of(Window w)
+{
+   Window root_ret, parent, *children;
+   unsigned int n;
+   while (1) {
+      x_error = 0;
+      if (!XQueryTree(display, w, &root_ret, &parent, &children, &n) || x_error) return None;
+      if (children != NULL) XFree(children);
+      if (parent == root || parent == None) return w;
+      w = parent;
+   }
+}
+
+
+// draw given window's frame into data at its place on screen; see composeWindows()
+static int _compose_window(const Window win, const int xx, const int yy, const int W, const int H,
+                           const int TW, const int TH, /*out*/ unsigned char *data)
+{
+   Window frame = _frame_of(win);
+   XWindowAttributes attr;
+   if (frame == None || !XGetWindowAttributes(display, frame, &attr) || x_error
+         || attr.map_state != IsViewable)  // eg. windows on hidden workspaces & tabs; i3 unmaps those
+      return -1;
+
+   // part of the frame within the region, in screen & thumbnail coordinates:
+   int x0 = attr.x > xx ? attr.x : xx;
+   int y0 = attr.y > yy ? attr.y : yy;
+   int x1 = attr.x + attr.width < xx + W ? attr.x + attr.width : xx + W;
+   int y1 = attr.y + attr.height < yy + H ? attr.y + attr.height : yy + H;
+   int tx0 = (long) (x0 - xx) * TW / W, ty0 = (long) (y0 - yy) * TH / H;
+   int tx1 = (long) (x1 - xx) * TW / W, ty1 = (long) (y1 - yy) * TH / H;
+   if (x1 <= x0 || y1 <= y0 || tx1 <= tx0 || ty1 <= ty0) return 0;  // off-region, or too small to show
+
+   Pixmap pixmap = XCompositeNameWindowPixmap(display, frame);
+   XImage *image = XGetImage(display, pixmap, x0 - attr.x, y0 - attr.y, x1 - x0, y1 - y0, AllPlanes, ZPixmap);
+   XFreePixmap(display, pixmap);
+   if (image == NULL || x_error) {
+      if (image != NULL) XDestroyImage(image);
+      return -1;
+   }
+   if (!image->red_mask) {  // not set for pixmaps, as they've no visual
+      image->red_mask = attr.visual->red_mask;
+      image->green_mask = attr.visual->green_mask;
+      image->blue_mask = attr.visual->blue_mask;
+   }
+
+   unsigned char *scaled = malloc((tx1 - tx0) * (ty1 - ty0) * 4);
+   _convert_scaled(image, 0, 0, x1 - x0, y1 - y0, tx1 - tx0, ty1 - ty0, scaled);
+   for (int y = 0; y < ty1 - ty0; y++)
+      memcpy(data + ((ty0 + y) * TW + tx0) * 4, scaled + y * (tx1 - tx0) * 4, (tx1 - tx0) * 4);
+   free(scaled);
    XDestroyImage(image);
-   XDestroyWindow(display, root);
-   XCloseDisplay(display);
+   return 0;
+}
+
+
+// draw frames of given n client windows, in given order, into data - which is
+// TWxTH BGRA of the WxH screen region at (xx, yy) - where they are on screen;
+// data is left as is elsewhere. Needs compositeRedirect() first. Returns no of
+// windows that couldn't be drawn (eg. unmapped ones), or -1 on failure.
+int composeWindows(const int, const unsigned long *, const int, const int, const int, const int,
+                   const int, const int, unsigned char *);
+int composeWindows(const int n, const unsigned long *wins, const int xx, const int yy, const int W, const int H,
+                   const int TW, const int TH, /*out*/ unsigned char *data)
+{
+   int result = -1;
+   pthread_mutex_lock(&lock);
+
+   if (_open_display()) {
+      XErrorHandler old_handler = XSetErrorHandler(_error_handler);
+      result = 0;
+      for (int i = 0; i < n; i++) {
+         if (_compose_window(wins[i], xx, yy, W, H, TW, TH, data) != 0) result++;
+      }
+      XSetErrorHandler(old_handler);
+   }
+
+   pthread_mutex_unlock(&lock);
+   return result;
+}
+
+
+// returns milliseconds since last user input, or -1 if the server doesn't support
+// the MIT-SCREEN-SAVER extension
+long idleTimeMs(void);
+long idleTimeMs(void)
+{
+   long result = -1;
+   pthread_mutex_lock(&lock);
+
+   int event_base, error_base;
+   if (_open_display() && XScreenSaverQueryExtension(display, &event_base, &error_base)) {
+      XScreenSaverInfo *info = XScreenSaverAllocInfo();
+      if (info != NULL) {
+         if (XScreenSaverQueryInfo(display, root, info)) result = info->idle;
+         XFree(info);
+      }
+   }
+
+   pthread_mutex_unlock(&lock);
+   return result;
+}
+
+
+// returns 0 on success
+int getScreen(const int, const int, const int, const int, unsigned char *);
+int getScreen(const int xx, const int yy, const int W, const int H, /*out*/ unsigned char * data)
+{
+   return getScreenScaled(xx, yy, W, H, W, H, data);
+}
+
+
+// release shared memory segments & the display connection; next grab reconnects.
+void closeDisplay(void);
+void closeDisplay(void)
+{
+   pthread_mutex_lock(&lock);
+   if (display != NULL) {
+      for (int i = 0; i < SHM_SLOTS; i++) _free_slot(&slots[i]);
+      _free_damage();
+      _unredirect();
+      XCloseDisplay(display);
+      display = NULL;
+   }
+   pthread_mutex_unlock(&lock);
 }
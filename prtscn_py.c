@@ -1,68 +1,12 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
-#include <stdio.h>
-#include <X11/X.h>
-#include <X11/Xutil.h>
-// Compile hint: gcc -shared -O3 -fPIC -Wl,-soname,prtscn `pkg-config --cflags --libs python3` -o prtscn.so prtscn.c -lX11
+#include "prtscn.c"
+// Compile hint: gcc -shared -O3 -fPIC -Wl,-soname,prtscn_py `pkg-config --cflags --libs python3` -o prtscn_py.so prtscn_py.c -lX11 -lXext -lXdamage -lXfixes -lXss -lXcomposite -lpthread
 
+// python bindings for the capture engine in prtscn.c, ie. these share its
+// persistent display connection & shm segments.
 // see https://stackoverflow.com/q/8001923/1803648 for the vararg
 
-void _grab_screen(Display *display, Window root, const int, const int, const int, const int, unsigned char *);
-void _grab_screen(Display *display, Window root, const int xx, const int yy, const int W, const int H, /*out*/ unsigned char * data)
-{
-   XImage *image = XGetImage(display, root, xx, yy, W, H, AllPlanes, ZPixmap);
-
-   unsigned long red_mask   = image->red_mask;
-   unsigned long green_mask = image->green_mask;
-   unsigned long blue_mask  = image->blue_mask;
-   int ii = 0;
-   for (int y = 0; y < H; y++) {
-       for (int x = 0; x < W; x++) {
-         unsigned long pixel = XGetPixel(image, x, y);
-         data[ii + 2] = (pixel & blue_mask);        // blue
-         data[ii + 1] = (pixel & green_mask) >> 8;  // green
-         data[ii]     = (pixel & red_mask) >> 16;   // red
-         ii += 3;
-      }
-   }
-
-   XDestroyImage(image);
-}
-
-
-void _grab_from_img(XImage *image, const int, const int, const int, const int, const unsigned long, const unsigned long, const unsigned long, unsigned char *);
-void _grab_from_img(XImage *image, const int xx, const int yy, const int W, const int H, const unsigned long red_mask, const unsigned long green_mask, const unsigned long blue_mask, /*out*/ unsigned char * data)
-{
-   int ii = 0;
-   for (int y = yy; y < H; y++) {
-       for (int x = xx; x < W; x++) {
-         unsigned long pixel = XGetPixel(image, x, y);
-         unsigned char blue  = (pixel & blue_mask);
-         unsigned char green = (pixel & green_mask) >> 8;
-         unsigned char red   = (pixel & red_mask) >> 16;
-
-         data[ii + 2] = blue;
-         data[ii + 1] = green;
-         data[ii] = red;
-         ii += 3;
-      }
-   }
-}
-
-
-// TODO: rename to get_screen_into to signify out data is to be provided?
-void get_screen(const int, const int, const int, const int, unsigned char *);
-void get_screen(const int x, const int y, const int w, const int h, /*out*/ unsigned char * data)
-{
-   Display *display = XOpenDisplay(NULL);
-   Window root = DefaultRootWindow(display);
-
-   _grab_screen(display, root, x, y, w, h, data);
-
-   XDestroyWindow(display, root);
-   XCloseDisplay(display);
-}
-
 
 int ParseArguments(long arr[],Py_ssize_t size, PyObject *args) {
     /* Get arbitrary number of positive numbers from Py_Tuple */
@@ -71,12 +15,12 @@ int ParseArguments(long arr[],Py_ssize_t size, PyObject *args) {
 
     for (i=0;i<size;i++) {
         temp_p = PyTuple_GetItem(args, i);
-        if(temp_p == NULL) {return NULL;}
+        if(temp_p == NULL) {return 0;}
 
         /* Check if temp_p is numeric */
         if (PyNumber_Check(temp_p) != 1) {
             PyErr_SetString(PyExc_TypeError,"Non-numeric argument.");
-            return NULL;
+            return 0;
         }
 
         /* Convert number to python long and than C unsigned long */
@@ -88,86 +32,83 @@ int ParseArguments(long arr[],Py_ssize_t size, PyObject *args) {
 }
 
 
-// no idea why, but grabbing all output images from single *image is slower
-static PyObject *get_screens_single_image(PyObject *self, PyObject *args)
+static PyObject *_grab_error(void)
+{
+    PyErr_SetString(PyExc_OSError, "unable to grab screen");
+    return NULL;
+}
+
+
+// grabs all given (x, y, w, h) regions via getScreensScaled() w/ given strategy;
+// the GIL is released while grabbing.
+static PyObject *_get_screens(PyObject *args, const int strategy)
 {
     Py_ssize_t TupleSize = PyTuple_Size(args);
 
-    if (!TupleSize) {
+    if (!TupleSize || TupleSize % 4) {
         if (!PyErr_Occurred())
-            PyErr_SetString(PyExc_TypeError,"You must supply at least one argument.");
-        return Py_None;
+            PyErr_SetString(PyExc_TypeError,"You must supply (x, y, w, h) quadruples.");
+        return NULL;
     }
 
     long *nums = malloc(TupleSize * sizeof(unsigned long));
     if (!(ParseArguments(nums, TupleSize, args))) {
         free(nums);
-        return Py_None;
+        return NULL;
     }
 
-    Display *display = XOpenDisplay(NULL);
-    Window root = DefaultRootWindow(display);
-    XWindowAttributes attr;
-    XGetWindowAttributes(display, root, &attr);
-    XImage *image = XGetImage(display, root, 0, 0, attr.width, attr.height, AllPlanes, ZPixmap);
-    unsigned long red_mask   = image->red_mask;
-    unsigned long green_mask = image->green_mask;
-    unsigned long blue_mask  = image->blue_mask;
-
-    PyObject *list_out = PyList_New(TupleSize/4);
-
-    for (int i=0; i < TupleSize; i+=4) {
-        int data_size = sizeof(unsigned char) * nums[i+2] * nums[i+3] * 3;  // *3 for R,G,B
-        unsigned char *data = (unsigned char *) malloc(data_size);
-        _grab_from_img(image, nums[i], nums[i+1], nums[i+2]+nums[i], nums[i+3]+nums[i+1], red_mask, green_mask, blue_mask, data);
-        PyObject *result = Py_BuildValue("y#", data, data_size);
-        free(data);
-        PyList_SET_ITEM(list_out, i/4, result);
+    int n = TupleSize / 4;
+    int *rects = malloc(n * 6 * sizeof(int));
+    unsigned char **data = malloc(n * sizeof(unsigned char *));
+    PyObject *list_out = PyList_New(n);
+
+    for (int i = 0; i < n; i++) {
+        long *r = nums + i * 4;
+        rects[i*6]     = r[0];
+        rects[i*6 + 1] = r[1];
+        rects[i*6 + 2] = rects[i*6 + 4] = r[2];
+        rects[i*6 + 3] = rects[i*6 + 5] = r[3];
+
+        // grab straight into the bytes objects we return:
+        PyObject *result = PyBytes_FromStringAndSize(NULL, r[2] * r[3] * 4);  // *4 for B,G,R,A
+        if (result == NULL) {
+            Py_DECREF(list_out);
+            list_out = NULL;
+            break;
+        }
+        data[i] = (unsigned char *) PyBytes_AS_STRING(result);
+        PyList_SET_ITEM(list_out, i, result);
     }
 
-    free(nums);
-    XDestroyImage(image);
-    XDestroyWindow(display, root);
-    XCloseDisplay(display);
+    if (list_out != NULL) {
+        int err;
+        Py_BEGIN_ALLOW_THREADS
+        err = getScreensScaled(n, rects, data, strategy);
+        Py_END_ALLOW_THREADS
+        if (err) {
+            Py_DECREF(list_out);
+            list_out = _grab_error();
+        }
+    }
 
+    free(data);
+    free(rects);
+    free(nums);
     return list_out;
 }
 
 
-static PyObject *get_screens(PyObject *self, PyObject *args)
+// grabs all output images from a single image of their bounding box
+static PyObject *get_screens_single_image(PyObject *self, PyObject *args)
 {
-    Py_ssize_t TupleSize = PyTuple_Size(args);
-
-    if (!TupleSize) {
-        if (!PyErr_Occurred())
-            PyErr_SetString(PyExc_TypeError,"You must supply at least one argument.");
-        return Py_None;
-    }
-
-    long *nums = malloc(TupleSize * sizeof(unsigned long));
-    if (!(ParseArguments(nums, TupleSize, args))) {
-        free(nums);
-        return Py_None;
-    }
-
-    Display *display = XOpenDisplay(NULL);
-    Window root = DefaultRootWindow(display);
-    PyObject *list_out = PyList_New(TupleSize/4);
-
-    for (int i=0; i < TupleSize; i+=4) {
-        int data_size = sizeof(unsigned char) * nums[i+2] * nums[i+3] * 3;  // *3 for R,G,B
-        unsigned char *data = (unsigned char *) malloc(data_size);
-        _grab_screen(display, root, nums[i], nums[i+1], nums[i+2], nums[i+3], data);
-        PyObject *result = Py_BuildValue("y#", data, data_size);
-        free(data);
-        PyList_SET_ITEM(list_out, i/4, result);
-    }
+    return _get_screens(args, CAPTURE_BOUNDING);
+}
 
-    free(nums);
-    XDestroyWindow(display, root);
-    XCloseDisplay(display);
 
-    return list_out;
+// grabs each output image separately
+static PyObject *get_screens(PyObject *self, PyObject *args)
+{
+    return _get_screens(args, CAPTURE_PER_REGION);
 }
 
 
@@ -175,30 +116,62 @@ static PyObject *get_screens(PyObject *self, PyObject *args)
 static PyObject *getScreenMethod(PyObject *self, PyObject *args) {
    int xx, yy, W, H;
     if (!PyArg_ParseTuple(args, "iiii", &xx, &yy, &W, &H)) {
-        PyErr_SetString(PyExc_TypeError, "arguments exception");
-        return Py_None;
+        return NULL;
     }
 
-    int data_size = sizeof(unsigned char) * W * H * 3;
-    unsigned char *data = (unsigned char *) malloc(data_size);
+    PyObject *result = PyBytes_FromStringAndSize(NULL, W * H * 4);  // *4 for B,G,R,A
+    if (result == NULL) return NULL;
 
-    Display *display = XOpenDisplay(NULL);
-    Window root = DefaultRootWindow(display);
+    int err;
+    Py_BEGIN_ALLOW_THREADS
+    err = getScreen(xx, yy, W, H, (unsigned char *) PyBytes_AS_STRING(result));
+    Py_END_ALLOW_THREADS
+    if (err) {
+        Py_DECREF(result);
+        return _grab_error();
+    }
+    return result;
+}
 
-    _grab_screen(display, root, xx, yy, W, H, data);
-    PyObject *result = Py_BuildValue("y#", data, data_size);
 
-    free(data);
-    XDestroyWindow(display, root);
-    XCloseDisplay(display);
+// grabs (x, y, w, h) region into given writable buffer of at least w*h*4 bytes,
+// eg. a recycled one, so nothing gets allocated
+static PyObject *grabIntoMethod(PyObject *self, PyObject *args) {
+    Py_buffer buf;
+    int xx, yy, W, H;
+    if (!PyArg_ParseTuple(args, "w*iiii", &buf, &xx, &yy, &W, &H)) {
+        return NULL;
+    }
 
-    return result;
+    if (W <= 0 || H <= 0 || buf.len < (Py_ssize_t) W * H * 4) {
+        PyBuffer_Release(&buf);
+        PyErr_SetString(PyExc_ValueError, "buffer too small for the region");
+        return NULL;
+    }
+
+    int err;
+    Py_BEGIN_ALLOW_THREADS
+    err = getScreen(xx, yy, W, H, (unsigned char *) buf.buf);
+    Py_END_ALLOW_THREADS
+    PyBuffer_Release(&buf);
+
+    if (err) return _grab_error();
+    Py_RETURN_NONE;
+}
+
+
+static PyObject *closeDisplayMethod(PyObject *self, PyObject *args) {
+    closeDisplay();
+    Py_RETURN_NONE;
 }
 
 
 static PyMethodDef prtscn_methods[] = {
    { "get_screens", get_screens, METH_VARARGS, ""},  // note last arg is docs
+   { "get_screens_single_image", get_screens_single_image, METH_VARARGS, ""},
    { "getScreen", getScreenMethod, METH_VARARGS, ""},
+   { "grab_into", grabIntoMethod, METH_VARARGS, ""},
+   { "closeDisplay", closeDisplayMethod, METH_NOARGS, ""},
    // NULL terminate Python looking at the object
    { NULL, NULL, 0, NULL }
 };
@@ -215,4 +188,3 @@ static struct PyModuleDef prtscn_py = {
 PyMODINIT_FUNC PyInit_prtscn_py(void) {
    return PyModule_Create(&prtscn_py);
 }
-
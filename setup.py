@@ -54,7 +54,7 @@ setup(
     # python_requires='>=3.7',
     install_requires=read_requirements("requirements.txt"),
     entry_points={
-        "console_scripts": ["i3expo = i3expo:run"]
+        "console_scripts": ["i3expo = i3expo:run", "i3expo-ctl = i3expo.ctl:main"]
     },
     extras_require={"test": read_requirements("requirements-test.txt")},
     classifiers=[
@@ -0,0 +1,43 @@
+from i3expo.bufpool import BufferPool
+from i3expo.thumbstore import ThumbnailStore
+
+
+def test_released_buffers_are_reused_oldest_first():
+    pool = BufferPool()
+    a = pool.acquire(2, 2)
+    b = pool.acquire(2, 2)
+    pool.release(2, 2, a)
+    pool.release(2, 2, b)
+    pool.release(2, 2, bytearray(16))  # not ours
+
+    assert pool.acquire(2, 2) is a
+    assert pool.acquire(2, 2) is b
+    assert pool.stats == {'allocs': 2, 'reuses': 2}
+
+
+def test_store_releases_replaced_data():
+    pool = BufferPool()
+    store = ThumbnailStore(release=pool.release)
+    a = pool.acquire(2, 2)
+    store.put(1, [2, 2, a])
+    store.put(1, [2, 2, pool.acquire(2, 2)])
+
+    assert pool.acquire(2, 2) is a
+
+
+def test_borrowed_data_is_not_recycled_till_given_back():
+    pool = BufferPool()
+    store = ThumbnailStore(release=pool.release)
+    a = pool.acquire(2, 2)
+    a[:] = [1] * 16
+    store.put(1, [2, 2, a])
+    shot = store.borrow(1)
+    store.put(1, [2, 2, pool.acquire(2, 2)])
+
+    b = pool.acquire(2, 2)  # eg. next capture
+    b[:] = [2] * 16
+    assert b is not a
+    assert bytes(shot[2]) == bytes([1] * 16)
+
+    store.give_back(shot)
+    assert pool.acquire(2, 2) is a
@@ -0,0 +1,19 @@
+from i3expo.ctl import ControlServer, send
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'ctl.sock')
+    calls = []
+    server = ControlServer(path, {
+        'toggle'  : lambda: calls.append('toggle'),
+        'refresh' : lambda ws=None: 'refreshing {}'.format(ws)
+    })
+    server.start()
+    try:
+        assert send(path, ['toggle']) == ('ok', True)
+        assert send(path, ['refresh', '3']) == ('refreshing 3', True)
+        assert send(path, ['refresh', '3', '4'])[1] is False
+        assert send(path, ['bogus']) == ('error: unknown command [bogus]', False)
+        assert calls == ['toggle']
+    finally:
+        server.stop()
@@ -0,0 +1,44 @@
+import time
+from i3expo.debounce import Debounce
+
+
+def test_called_once_with_last_args():
+    calls = []
+    d = Debounce(0.05, calls.append)
+    for i in range(5):
+        d(i)
+        time.sleep(0.01)
+    time.sleep(0.15)
+
+    assert calls == [4]
+    assert d.stats == {'calls': 5, 'invocations': 1}
+
+
+def test_max_wait_fires_during_steady_calls():
+    calls = []
+    d = Debounce(0.05, calls.append, max_wait=0.1)
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < 0.25:
+        d(time.monotonic())
+        time.sleep(0.01)
+
+    assert len(calls) >= 2
+
+
+def test_reset_drops_pending_call():
+    calls = []
+    d = Debounce(0.05, calls.append)
+    d(1)
+    d.reset()
+    time.sleep(0.1)
+
+    assert calls == []
+
+
+def test_period_adapts_to_call_rate():
+    d = Debounce(0.05, lambda: None, max_period=0.5)
+    for _ in range(5):
+        d()
+        time.sleep(0.08)
+
+    assert 0.08 < d.current_period() <= 0.5
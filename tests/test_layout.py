@@ -0,0 +1,23 @@
+import pytest
+from i3expo.main import get_max_tile_dimensions, resolve_grid_layout
+
+
+def test_resolve_grid_layout():
+    assert resolve_grid_layout(1920, 1080, range(7)) == [3, 2, 2]
+    assert resolve_grid_layout(1080, 1920, range(5)) == [2, 2, 1]
+
+
+def test_tile_width_bound_by_screen_width():
+    # 1920x1080 with default 5% padding & 4% spacing:
+    w, h = get_max_tile_dimensions(1920, 1080, 96, 54, 76.8, 43.2, (3, 3))
+    assert w == pytest.approx(524.8)
+    assert h == pytest.approx(524.8 * 1080 / 1920)
+
+
+def test_tile_width_bound_by_screen_height():
+    w, h = get_max_tile_dimensions(1920, 1080, 96, 54, 76.8, 43.2, (1, 1, 1))
+    assert h == pytest.approx((1080 - 2*43.2 - 2*54) / 3)
+
+
+def test_no_room_for_tiles():
+    assert get_max_tile_dimensions(100, 100, 60, 60, 0, 0, (1,)) == (0, 0)
@@ -0,0 +1,45 @@
+import json
+
+from i3expo.metrics import Metrics
+
+
+def test_histogram_percentiles_and_counters():
+    m = Metrics()
+    for _ in range(9):
+        m.observe('grab', 0.002)  # 2ms, ie. in the 2.5ms bucket
+    m.observe('grab', 0.3)
+    m.incr('skipped')
+    m.incr('skipped', 2)
+    m.gauge('broken', lambda: 1 / 0)
+
+    snap = m.snapshot()
+    grab = snap['timings']['grab']
+    assert grab['count'] == 10
+    assert grab['p50_ms'] == 2.5  # bucket upper bound
+    assert grab['p99_ms'] == 300
+    assert grab['max_ms'] == 300
+    assert snap['counters'] == {'skipped': 3}
+    assert snap['gauges']['broken'].startswith('n/a')
+
+
+def test_dump(tmp_path):
+    m = Metrics()
+    with m.timer('draw'):
+        pass
+    m.dump(str(tmp_path / 'stats'))
+
+    with open(tmp_path / 'stats') as f:
+        assert json.load(f)['timings']['draw']['count'] == 1
+
+
+def test_dump_replaces_symlink_instead_of_writing_through_it(tmp_path):
+    target = tmp_path / 'target'
+    target.write_text('keep')
+    (tmp_path / 'stats').symlink_to(target)
+    (tmp_path / 'stats.tmp').symlink_to(target)  # as planted for the old fixed temp path
+
+    Metrics().dump(str(tmp_path / 'stats'))
+
+    assert target.read_text() == 'keep'
+    assert not (tmp_path / 'stats').is_symlink()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['stats', 'stats.tmp', 'target']
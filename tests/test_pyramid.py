@@ -0,0 +1,21 @@
+from i3expo.pyramid import Pyramid
+
+
+def test_serves_smallest_level_no_smaller_than_target():
+    built = []
+
+    def downscale(img, size):
+        built.append(size)
+        return size
+
+    p = Pyramid((1600, 800), downscale)
+    assert p.get('base', 1000, 500) == 'base'
+    assert built == []
+
+    assert p.get('base', 300, 150) == (400, 200)
+    assert built == [(800, 400), (400, 200)]
+
+    assert p.get('base', 500, 100) == (800, 400)  # bound by width
+    assert p.get('base', 1, 1, build=False) == (400, 200)
+    assert p.get('base', 1, 1) == (50, 25)  # down to min_size
+    assert len(built) == 5  # levels are only built once
@@ -0,0 +1,30 @@
+from i3expo.refresh import RefreshScheduler, screen_locked
+
+
+def test_unchanged_ws_backs_off_exponentially():
+    r = RefreshScheduler(10, 60)
+    assert r.due(1, 0)
+
+    r.record(1, False, 0)
+    assert not r.due(1, 19) and r.due(1, 20)
+    r.record(1, False, 20)
+    r.record(1, False, 60)
+    r.record(1, False, 120)
+    assert r.intervals[1] == 60
+
+
+def test_changing_ws_speeds_back_up():
+    r = RefreshScheduler(10, 60)
+    r.intervals[1] = 60
+    r.record(1, True, 0)
+    assert r.intervals[1] == 30
+    r.record(1, True, 30)
+    r.record(1, True, 45)
+    assert r.intervals[1] == 10
+
+
+def test_screen_locked():
+    with open('/proc/self/comm') as f:
+        us = f.read().strip()
+    assert screen_locked({us})
+    assert not screen_locked({'no-such-locker'})
@@ -0,0 +1,34 @@
+import os
+import zlib
+import pytest
+from i3expo import snapshot
+
+
+def test_roundtrip():
+    raw = bytearray(range(16))
+    compressed = zlib.compress(bytes(64))
+    snapshot.write('state', {'timestamp': 1}, {1: [2, 2, raw, False], 2: [4, 4, compressed, True]})
+
+    meta, sections = snapshot.read('state')
+    assert meta == {'timestamp': 1}
+    assert sections['1'][:2] == [2, 2] and bytes(sections['1'][2]) == raw
+    assert sections['2'][3] and zlib.decompress(sections['2'][2]) == bytes(64)
+
+
+def test_rejects_out_of_bounds_section():
+    snapshot.write('state', {}, {1: [2, 2, bytearray(16), False]})
+    with open('state', 'rb') as f:
+        data = f.read()
+    with open('state', 'wb') as f:
+        f.write(data.replace(b'[2, 2, 0, 16, false]', b'[2, 2, 9, 16, false]'))
+
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.read('state')
+
+
+def test_rejects_world_writable_file():
+    snapshot.write('state', {}, {})
+    os.chmod('state', 0o666)
+
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.read('state')
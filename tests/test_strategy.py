@@ -0,0 +1,37 @@
+from i3expo.strategy import StrategyPicker
+
+
+def test_settles_on_cheapest_strategy():
+    p = StrategyPicker(['a', 'b'], probes=2, reprobe_every=10)
+    cost = {'a': 2.0, 'b': 1.0}
+    picked = []
+    for _ in range(9):
+        s = p.pick('layout')
+        p.record('layout', s, cost[s])
+        picked.append(s)
+
+    assert sorted(picked[:4]) == ['a', 'a', 'b', 'b']
+    assert picked[4:] == ['b'] * 5
+    assert p.pick('layout') == 'a'  # re-probe
+    assert p.best() == {'layout': 'b'}
+
+
+def test_failed_grabs_are_not_recorded(monkeypatch):
+    import logging
+    import i3expo.main as m
+
+    class FailingLib(object):
+        def getScreensScaled(self, n, rects, bufs, strategy):
+            return -1
+
+    picker = StrategyPicker([m.CAPTURE_PER_REGION, m.CAPTURE_BOUNDING])
+    monkeypatch.setattr(m, 'grab', FailingLib(), raising=False)
+    monkeypatch.setattr(m, 'capture_strategy', picker)
+    monkeypatch.setattr(m, 'thumbnail_size', 'off', raising=False)
+    monkeypatch.setattr(m, 'damage_tracking', False, raising=False)
+    monkeypatch.setattr(m, 'logger', logging.getLogger('test'), raising=False)
+    wks = [{'name': str(n), 'op': 'o', 'x': n * 4, 'y': 0, 'w': 4, 'h': 2} for n in range(2)]
+
+    assert m.grab_screens(wks) == [None, None]
+    layout = ((0, 0, 4, 2), (4, 0, 4, 2))
+    assert all(times == 0 for _, times in picker.samples[layout].values())
@@ -0,0 +1,51 @@
+from i3expo.thumbstore import ThumbnailStore
+
+
+def shot(fill, w=64, h=32):
+    return [w, h, bytearray([fill]) * (w * h * 4)]
+
+
+def test_cold_entries_get_compressed():
+    store = ThumbnailStore(hot_count=2)
+    for i in range(4):
+        store.put(i, shot(i))
+
+    stats = store.get_stats()
+    assert stats['entries'] == 4
+    assert stats['compressed'] == 2
+    assert store.get(0) == shot(0)
+    assert store.get_stats()['decompressions'] == 1
+
+
+def test_lru_eviction_over_mem_limit():
+    store = ThumbnailStore(mem_limit=3 * 64 * 32 * 4, hot_count=10)
+    for i in range(4):
+        store.put(i, shot(i))
+    store.get(1)  # 1 becomes most recently used, so 0 & 2 go first
+    store.put(4, shot(4))
+
+    assert store.keys() == [3, 1, 4]
+    assert store.get(0) is None
+    assert store.get_stats()['evictions'] == 2
+    assert store.get_stats()['misses'] == 1
+
+
+def test_export_restore_roundtrip():
+    store = ThumbnailStore(hot_count=1)
+    store.put(1, shot(1))
+    store.put(2, shot(2))
+
+    other = ThumbnailStore(hot_count=1)
+    other.restore(store.export())
+    assert other.get(1) == shot(1)
+    assert other.get(2) == shot(2)
+
+
+def test_is_cold():
+    store = ThumbnailStore(hot_count=1)
+    store.put(1, shot(1))
+    store.put(2, shot(2))
+
+    assert store.is_cold(1)
+    assert not store.is_cold(2)
+    assert not store.is_cold(3)
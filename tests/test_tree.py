@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+from i3ipc.con import Con
+from i3expo.tree import TreeModel
+
+
+def con(id, type='con', focused=False, nodes=(), **kw):
+    return dict(id=id, type=type, focused=focused, nodes=list(nodes), floating_nodes=[], name=str(id),
+                rect=dict(x=0, y=0, width=1, height=1), **kw)
+
+
+class FakeI3(object):
+    def __init__(self):
+        self.fetches = 0
+
+    def get_tree(self):
+        self.fetches += 1
+        return Con(con(1, 'root', nodes=[
+            con(2, 'workspace', nodes=[con(3, focused=True), con(4)], output='DP1'),
+            con(5, 'workspace', nodes=[con(6)], output='DP1')
+        ]), None, self)
+
+
+def test_focus_applied_in_place():
+    i3 = FakeI3()
+    m = TreeModel(i3)
+    assert m.tree().find_focused().id == 3
+
+    m.on_window(i3, SimpleNamespace(change='focus', container=SimpleNamespace(id=4)))
+    assert m.tree().find_focused().id == 4
+    ws = SimpleNamespace(change='focus', current=Con(con(5, 'workspace', nodes=[con(6, focused=True)], output='DP1'), None, i3))
+    m.on_workspace(i3, ws)
+    assert m.tree().find_focused().id == 6
+    assert i3.fetches == 1
+
+
+def test_structural_change_refetches():
+    i3 = FakeI3()
+    m = TreeModel(i3)
+    m.tree()
+    m.on_window(i3, SimpleNamespace(change='new', container=SimpleNamespace(id=7)))
+    m.tree()
+    assert i3.fetches == 2